@@ -1,16 +1,47 @@
 """
 Utility for logging user activity in the back-office.
 Logs to both the DB (UserActivityLog) and a JSON-lines flat file for precision.
+
+log_activity() only builds the entry and puts it on an in-process queue;
+ActivityLogWriter's background thread drains the queue every
+ACTIVITY_LOG_FLUSH_INTERVAL seconds (or as soon as ACTIVITY_LOG_BATCH_SIZE
+entries wait) and writes the whole batch at once: one bulk_create for the
+DB rows, one buffered write for the file lines. The request no longer waits
+on an INSERT plus an open/append/close of the file.
+
+What is still queued is written on shutdown (atexit) and by flush(), which
+the journal view calls before reading. Entries logged inside a transaction
+are queued on commit, so a rolled-back action is not logged at all. This is
+a behaviour change: the former code wrote the file line immediately, so the
+line stayed in the flat file while the DB row rolled back with the
+transaction.
+ACTIVITY_LOG_ASYNC = False writes synchronously (tests, one-off scripts).
 """
+import atexit
 import json
+import logging
 import os
+import queue
+import re
+import threading
 from datetime import datetime, timezone as dt_tz
 
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows (dev)
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
 # Path to the flat-file activity log (relative to Django BASE_DIR / project root)
 ACTIVITY_LOG_PATH = os.path.join(
     os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
     "logs", "activity.log"
 )
+ROTATED_NAME_RE = re.compile(r'\.\d{8}-\d{6}(-\d+)?')
 
 
 def _ensure_log_dir():
@@ -18,16 +49,144 @@ def _ensure_log_dir():
     os.makedirs(log_dir, exist_ok=True)
 
 
-def _write_to_file(entry: dict):
-    """Append a JSON-line entry to the activity log file."""
+def _rotated_path(mtime: float) -> str:
+    stamp = datetime.fromtimestamp(mtime, dt_tz.utc).strftime('%Y%m%d-%H%M%S')
+    path = f"{ACTIVITY_LOG_PATH}.{stamp}"
+    n = 1
+    while os.path.exists(path):
+        path = f"{ACTIVITY_LOG_PATH}.{stamp}-{n}"
+        n += 1
+    return path
+
+
+def rotated_logs() -> list[str]:
+    """Rotated activity logs, newest first (activity.log.<YYYYmmdd-HHMMSS>[-n])."""
+    log_dir, name = os.path.split(ACTIVITY_LOG_PATH)
+    try:
+        suffixes = [f[len(name):] for f in os.listdir(log_dir) if f.startswith(name)]
+    except FileNotFoundError:
+        return []
+    suffixes = [suffix for suffix in suffixes if ROTATED_NAME_RE.fullmatch(suffix)]
+    # .20261018-071500 < .20261018-071500-1 < .20261018-071500-2
+    suffixes.sort(key=lambda suffix: (suffix[:16], int(suffix[17:] or 0)), reverse=True)
+    return [ACTIVITY_LOG_PATH + suffix for suffix in suffixes]
+
+
+def _rotate_if_needed():
+    """
+    Start a new file when the current one exceeds ACTIVITY_LOG_MAX_BYTES or was
+    last written on a previous (UTC) day; keep ACTIVITY_LOG_BACKUP_COUNT old ones.
+    """
+    try:
+        st = os.stat(ACTIVITY_LOG_PATH)
+    except FileNotFoundError:
+        return
+    max_bytes = getattr(settings, 'ACTIVITY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+    today = datetime.now(dt_tz.utc).date()
+    if st.st_size < max_bytes and datetime.fromtimestamp(st.st_mtime, dt_tz.utc).date() == today:
+        return
+
+    # Plusieurs workers gunicorn écrivent le même fichier : un seul le renomme
+    with open(f"{ACTIVITY_LOG_PATH}.lock", "a") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            current = os.stat(ACTIVITY_LOG_PATH)
+        except FileNotFoundError:
+            return
+        if current.st_ino != st.st_ino:
+            return  # déjà fait par un autre process
+        os.rename(ACTIVITY_LOG_PATH, _rotated_path(current.st_mtime))
+        for path in rotated_logs()[getattr(settings, 'ACTIVITY_LOG_BACKUP_COUNT', 30):]:
+            os.remove(path)
+
+
+def _write_to_file(lines: list[str]):
+    """Append JSON lines to the activity log file, in one write."""
     try:
         _ensure_log_dir()
+        _rotate_if_needed()
         with open(ACTIVITY_LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.write("".join(line + "\n" for line in lines))
     except Exception:
         pass  # Never crash on logging failure
 
 
+def _write_to_db(rows: list[dict]):
+    from .models import UserActivityLog
+    try:
+        UserActivityLog.objects.bulk_create([UserActivityLog(**row) for row in rows])
+        return
+    except Exception:
+        pass
+    # Une ligne invalide ne doit pas faire perdre tout le lot
+    for row in rows:
+        try:
+            UserActivityLog.objects.create(**row)
+        except Exception as e:
+            logger.error(f'Failed to write activity log row ({row.get("action")}): {e}')
+
+
+class ActivityLogWriter:
+    def __init__(self):
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._write_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def put(self, row: dict | None, line: str | None):
+        self._queue.put((row, line))
+        self._ensure_thread()
+        if self._queue.qsize() >= getattr(settings, 'ACTIVITY_LOG_BATCH_SIZE', 500):
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        # Après un fork (gunicorn --preload) le thread du parent n'existe pas dans le worker
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, 'ACTIVITY_LOG_FLUSH_INTERVAL', 1.0)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            close_old_connections()
+            self.flush()
+
+    def flush(self):
+        """Write everything queued so far (any thread)."""
+        with self._write_lock:
+            rows, lines = [], []
+            while True:
+                try:
+                    row, line = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is not None:
+                    rows.append(row)
+                if line is not None:
+                    lines.append(line)
+            if rows:
+                _write_to_db(rows)
+            if lines:
+                _write_to_file(lines)
+
+
+writer = ActivityLogWriter()
+atexit.register(writer.flush)
+
+
+def flush():
+    writer.flush()
+
+
 def log_activity(user, action: str, description: str, request=None,
                  target_email: str = '', extra=None):
     """
@@ -35,8 +194,6 @@ def log_activity(user, action: str, description: str, request=None,
     action must be one of the ACTION_CHOICES keys defined in UserActivityLog.
     extra: optional dict with additional details (e.g. old/new price, product id…)
     """
-    from .models import UserActivityLog
-
     ip = None
     if request:
         x_forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -46,17 +203,19 @@ def log_activity(user, action: str, description: str, request=None,
             else request.META.get('REMOTE_ADDR')
         )
 
-    # ── DB log ────────────────────────────────────────────────────────────────
-    try:
-        UserActivityLog.objects.create(
-            user=user,
-            action=action,
-            description=description,
-            target_user_email=target_email,
-            ip_address=ip,
-        )
-    except Exception:
-        pass
+    now = datetime.now(dt_tz.utc)
+
+    # ── DB log (pas de ligne pour un utilisateur anonyme, comme avant) ─────────
+    row = None
+    if user is None or getattr(user, 'pk', None):
+        row = {
+            "user": user,
+            "action": action,
+            "description": description,
+            "target_user_email": target_email,
+            "ip_address": ip,
+            "created_at": now,
+        }
 
     # ── File log ──────────────────────────────────────────────────────────────
     user_name = ""
@@ -70,7 +229,7 @@ def log_activity(user, action: str, description: str, request=None,
         pass
 
     entry = {
-        "ts": datetime.now(dt_tz.utc).isoformat(),
+        "ts": now.isoformat(),
         "action": action,
         "user_name": user_name,
         "user_email": user_email,
@@ -81,5 +240,13 @@ def log_activity(user, action: str, description: str, request=None,
     }
     if extra:
         entry["extra"] = extra
+    try:
+        # Sérialisé maintenant : `extra` peut être modifié par l'appelant ensuite
+        line = json.dumps(entry, ensure_ascii=False)
+    except Exception:
+        line = None  # Never crash on logging failure
 
-    _write_to_file(entry)
+    if getattr(settings, 'ACTIVITY_LOG_ASYNC', True):
+        transaction.on_commit(lambda: writer.put(row, line))
+    else:
+        transaction.on_commit(lambda: (row and _write_to_db([row]), line and _write_to_file([line])))
@@ -0,0 +1,158 @@
+"""
+Transactional e-mail outbox.
+
+The order views no longer talk to the SMTP server: enqueue() stores the
+rendered message as an OutboxEmail row, in the transaction that creates or
+updates the order — the e-mail exists if and only if the order change was
+committed, and the request never waits on the mail provider.
+
+The `email_worker` management command drains the table:
+
+    claim_batch()     SELECT ... FOR UPDATE SKIP LOCKED on the due `pending`
+                      rows, flipped to `sending` in the same transaction —
+                      several workers never send the same e-mail.
+    deliver(emails)   sends a batch through ONE backend connection (a single
+                      SMTP handshake + TLS + auth for the whole batch). A failed
+                      message is retried after EMAIL_OUTBOX_RETRY_DELAY * 2^n
+                      seconds, then marked `failed` after EMAIL_OUTBOX_MAX_ATTEMPTS.
+
+The connection comes from django.core.mail.get_connection(), so EMAIL_BACKEND
+applies (locmem in tests, console in dev). With EMAIL_OUTBOX_INLINE = True
+(dev without a worker) the e-mail is sent right after the commit instead.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(subject: str, body: str, recipients: list[str], html_body: str = '', from_email: str = '') -> OutboxEmail:
+    # Savepoint : un échec d'insertion n'invalide pas la transaction de la commande
+    with transaction.atomic():
+        email = OutboxEmail.objects.create(
+            subject=subject[:255],
+            body=body,
+            html_body=html_body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipients=list(recipients),
+            next_attempt_at=timezone.now(),
+        )
+    if getattr(settings, 'EMAIL_OUTBOX_INLINE', False):
+        transaction.on_commit(lambda: _deliver_now(email.pk))
+    return email
+
+
+def enqueue_many(messages: list[dict]) -> list[OutboxEmail]:
+    """enqueue() for a batch of messages (enqueue() keyword arguments), in one INSERT."""
+    now = timezone.now()
+    with transaction.atomic():
+        emails = OutboxEmail.objects.bulk_create([
+            OutboxEmail(
+                subject=message['subject'][:255],
+                body=message['body'],
+                html_body=message.get('html_body', ''),
+                from_email=message.get('from_email') or settings.DEFAULT_FROM_EMAIL,
+                recipients=list(message['recipients']),
+                next_attempt_at=now,
+            )
+            for message in messages
+        ])
+    if emails and getattr(settings, 'EMAIL_OUTBOX_INLINE', False):
+        transaction.on_commit(lambda: _deliver_now(*[email.pk for email in emails]))
+    return emails
+
+
+def _deliver_now(*pks: int):
+    emails = claim_batch(limit=len(pks), ids=pks)
+    if emails:
+        deliver(emails)
+
+
+def claim_batch(limit: int = 50, ids=None) -> list[OutboxEmail]:
+    with transaction.atomic():
+        queryset = OutboxEmail.objects.select_for_update(skip_locked=True).filter(
+            status='pending', next_attempt_at__lte=timezone.now(),
+        )
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        emails = list(queryset.order_by('next_attempt_at')[:limit])
+        if emails:
+            OutboxEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                status='sending', updated_at=timezone.now(),
+            )
+    return emails
+
+
+def requeue_stale(minutes: int) -> int:
+    """E-mails left `sending` by a dead worker go back to `pending` (may be sent twice, never lost)."""
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return OutboxEmail.objects.filter(status='sending', updated_at__lt=limit).update(
+        status='pending', updated_at=timezone.now(),
+    )
+
+
+def _message(email: OutboxEmail, connection) -> EmailMultiAlternatives:
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=email.recipients,
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 60)
+    return timedelta(seconds=min(base * 2 ** (attempts - 1), 6 * 3600))
+
+
+def deliver(emails: list[OutboxEmail]) -> tuple[int, int]:
+    """Send claimed e-mails over one connection. Returns (sent, failed attempts)."""
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 6)
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        for email in emails:
+            email.attempts += 1
+            try:
+                # open() ne fait rien si la connexion est déjà ouverte
+                connection.open()
+                _message(email, connection).send()
+            except Exception as e:
+                failed += 1
+                email.last_error = str(e)[:2000]
+                if email.attempts >= max_attempts:
+                    email.status = 'failed'
+                    logger.error(f'Outbox email #{email.pk} abandoned after {email.attempts} attempts: {e}')
+                else:
+                    email.status = 'pending'
+                    email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+                    logger.warning(f'Outbox email #{email.pk} failed (attempt {email.attempts}), retry at {email.next_attempt_at}: {e}')
+                # Connexion peut-être cassée (SMTPServerDisconnected…) : rouverte pour le suivant
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            else:
+                sent += 1
+                email.status = 'sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                logger.info(f'✅ Outbox email #{email.pk} sent to {", ".join(email.recipients)}')
+            email.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at', 'updated_at'])
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, failed
@@ -0,0 +1,65 @@
+"""
+Rendering of the transactional e-mails (templates/emails/).
+
+  - Each template is looked up and compiled once per process: template()
+    keeps the Template object, so a send skips the loader chain entirely
+    (Django's cached loader would still resolve the name on every
+    render_to_string call).
+  - The data an order e-mail shows — items, subtotal, customer, address —
+    is read once per order by order_context(), and every variant (customer
+    confirmation, admin / sales notification, status update, invoice) is
+    rendered from that same context. The templates loop over `items`, a
+    list, instead of querying `order.items.all` in each copy.
+  - order_contexts(orders) builds the contexts of a batch of orders with one
+    query for the orders + customers and one for all their items.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.template.loader import get_template
+from django.utils.html import strip_tags
+
+
+@lru_cache(maxsize=None)
+def _compiled(name: str):
+    return get_template(name)
+
+
+def template(name: str):
+    if settings.DEBUG:
+        # runserver : un template modifié doit être relu sans redémarrage
+        return get_template(name)
+    return _compiled(name)
+
+
+def render(name: str, context: dict) -> tuple[str, str]:
+    """(html, text) of an e-mail template."""
+    html = template(name).render(context)
+    return html, strip_tags(html)
+
+
+def order_context(order) -> dict:
+    """Everything the order templates show, read once for all the copies of one order."""
+    user = order.user
+    return {
+        'order': order,
+        # Profite du prefetch_related('items') de l'appelant s'il existe
+        'items': list(order.items.all()),
+        'subtotal': float(order.total_amount) - float(getattr(order, 'delivery_cost', 0) or 0),
+        'frontend_url': getattr(settings, 'FRONTEND_URL', 'http://localhost:3000'),
+        'customer_name': user.get_full_name() or user.email,
+        'customer_email': user.email,
+        'customer_phone': getattr(user, 'phone_number', 'N/A'),
+        'shipping_address': order.shipping_address,
+    }
+
+
+def order_contexts(orders) -> list[dict]:
+    """order_context() of each order of a batch (queryset or iterable of Order / pks)."""
+    from orders.models import Order
+
+    if not hasattr(orders, 'model'):
+        orders = list(orders)
+        pks = [order.pk if hasattr(order, 'pk') else order for order in orders]
+        orders = Order.objects.filter(pk__in=pks).order_by('pk')
+    return [order_context(order) for order in orders.select_related('user').prefetch_related('items')]
@@ -1,10 +1,11 @@
 from django.core.mail import send_mail
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.conf import settings
 from django.utils import timezone
 import logging
 
+from . import email_outbox
+from .email_rendering import order_context, order_contexts, render
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,13 +17,12 @@ def send_verification_email(user, verification_code, frontend_url=None):
     subject = 'Vérifiez votre email - PneuShop'
     verification_url = f"{frontend_url}/auth/verify-email?user_id={user.id}&code={verification_code}"
 
-    html_content = render_to_string('emails/email_verification.html', {
+    html_content, text_content = render('emails/email_verification.html', {
         'user': user,
         'verification_url': verification_url,
         'verification_code': verification_code,
         'frontend_url': frontend_url,
     })
-    text_content = strip_tags(html_content)
 
     try:
         send_mail(
@@ -44,11 +44,10 @@ def send_welcome_email(user):
     frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
     subject = 'Bienvenue chez PneuShop !'
 
-    html_content = render_to_string('emails/welcome_email.html', {
+    html_content, text_content = render('emails/welcome_email.html', {
         'user': user,
         'frontend_url': frontend_url,
     })
-    text_content = strip_tags(html_content)
 
     try:
         send_mail(
@@ -69,14 +68,13 @@ def send_password_reset_email(user, reset_url, token=None, request_ip=None):
     """Send password reset email with secure token"""
     subject = 'Réinitialisation de votre mot de passe PneuShop'
 
-    html_content = render_to_string('emails/password_reset_email.html', {
+    html_content, text_content = render('emails/password_reset_email.html', {
         'user': user,
         'reset_url': reset_url,
         'token': token,
         'request_ip': request_ip,
         'now': timezone.now(),
     })
-    text_content = strip_tags(html_content)
 
     try:
         send_mail(
@@ -93,171 +91,150 @@ def send_password_reset_email(user, reset_url, token=None, request_ip=None):
         raise
 
 
-def send_order_confirmation_email(order):
+# ─── E-mails de commande ──────────────────────────────────────────────────────
+# Mis en file d'envoi (accounts.email_outbox) dans la transaction de la
+# commande, puis envoyés par `python manage.py email_worker`.
+# `context` : email_rendering.order_context(order), à construire une fois
+# quand plusieurs e-mails partent pour la même commande.
+
+ORDER_STATUS_LABELS = {
+    'confirmed': 'Confirmée',
+    'processing': 'En cours de traitement',
+    'shipped': 'Expédiée',
+    'delivered': 'Livrée',
+    'cancelled': 'Annulée',
+}
+
+
+def send_new_order_emails(order):
+    """
+    Customer confirmation + admin and sales notifications, rendered from one
+    order context. Each e-mail is queued on its own: a failure does not keep
+    the other one from being queued.
+    """
+    context = order_context(order)
+    for send in (send_order_confirmation_email, send_new_order_notification_email):
+        try:
+            send(order, context)
+        except Exception:
+            pass  # déjà journalisé par send()
+
+
+def send_order_confirmation_email(order, context=None):
     """
     Send order confirmation email with HTML template
     Sends to BOTH customer AND admin
     """
     try:
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
-        subtotal = float(order.total_amount) - float(getattr(order, 'delivery_cost', 0) or 0)
+        context = context or order_context(order)
 
         # 1. Email to customer
         subject = f'Confirmation de commande n°{order.id} - PneuShop'
-        html_content = render_to_string('emails/order_confirmation_email.html', {
-            'order': order,
-            'subtotal': subtotal,
-            'frontend_url': frontend_url,
-        })
-        text_content = strip_tags(html_content)
+        html_content, text_content = render('emails/order_confirmation_email.html', context)
 
-        send_mail(
-            subject=subject,
-            message=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.user.email],
-            html_message=html_content,
-            fail_silently=False,
-        )
-        logger.info(f'✅ Order confirmation email sent to CUSTOMER: {order.user.email} for order #{order.id}')
+        email_outbox.enqueue(subject, text_content, [context['customer_email']], html_body=html_content)
+        logger.info(f'✅ Order confirmation email queued for CUSTOMER: {context["customer_email"]} for order #{order.id}')
 
         # 2. Notification email to admin
-        admin_subject = f'🔔 Nouvelle commande n°{order.id} - {order.user.get_full_name() or order.user.email}'
-        phone_number = getattr(order.user, 'phone_number', 'N/A')
-        admin_html = render_to_string('emails/order_notification_admin.html', {
-            'order': order,
-            'subtotal': subtotal,
-            'frontend_url': frontend_url,
-            'customer_phone': phone_number,
-        })
-        admin_text = strip_tags(admin_html)
+        admin_subject = f'🔔 Nouvelle commande n°{order.id} - {context["customer_name"]}'
+        admin_html, admin_text = render('emails/order_notification_admin.html', context)
         admin_email = getattr(settings, 'ADMIN_EMAIL', 'admin@pneushop.tn')
 
-        send_mail(
-            subject=admin_subject,
-            message=admin_text,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[admin_email],
-            html_message=admin_html,
-            fail_silently=False,
-        )
-        logger.info(f'✅ Order notification email sent to ADMIN: {admin_email}')
+        email_outbox.enqueue(admin_subject, admin_text, [admin_email], html_body=admin_html)
+        logger.info(f'✅ Order notification email queued for ADMIN: {admin_email}')
 
     except Exception as e:
         logger.error(f'Failed to send order confirmation email for order #{order.id}: {str(e)}')
         raise
 
 
-def send_new_order_notification_email(order):
+def send_new_order_notification_email(order, context=None):
     """
     Send internal notification to sales responsible when a new order is created.
     """
     try:
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
+        context = context or order_context(order)
         sales_email = getattr(settings, 'SALES_EMAIL', getattr(settings, 'ADMIN_EMAIL', 'pneushop.contact@gmail.com'))
-        subtotal = float(order.total_amount) - float(getattr(order, 'delivery_cost', 0) or 0)
 
         subject = f'🛒 Nouvelle commande #{order.id} - Responsable Vente PneuShop'
-        html_content = render_to_string('emails/order_notification_admin.html', {
-            'order': order,
-            'subtotal': subtotal,
-            'frontend_url': frontend_url,
-            'customer_phone': getattr(order.user, 'phone_number', 'N/A'),
-        })
-        text_content = strip_tags(html_content)
+        html_content, text_content = render('emails/order_notification_admin.html', context)
 
-        send_mail(
-            subject=subject,
-            message=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[sales_email],
-            html_message=html_content,
-            fail_silently=False,
-        )
-        logger.info(f'✅ Sales notification email sent to {sales_email} for order #{order.id}')
+        email_outbox.enqueue(subject, text_content, [sales_email], html_body=html_content)
+        logger.info(f'✅ Sales notification email queued for {sales_email} for order #{order.id}')
 
     except Exception as e:
         logger.error(f'Failed to send sales notification email for order #{order.id}: {str(e)}')
         raise
 
 
-def send_delivery_invoice_email(order):
+def send_delivery_invoice_email(order, context=None):
     """
     Send a full invoice to the customer when order status changes to 'delivered'.
     """
     try:
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
-        subtotal = float(order.total_amount) - float(getattr(order, 'delivery_cost', 0) or 0)
+        context = context or order_context(order)
 
         subject = f'Votre facture PneuShop - Commande n°{order.order_number}'
-        html_content = render_to_string('emails/delivery_invoice_email.html', {
-            'order': order,
-            'subtotal': subtotal,
-            'frontend_url': frontend_url,
-        })
-        text_content = strip_tags(html_content)
+        html_content, text_content = render('emails/delivery_invoice_email.html', context)
 
-        send_mail(
-            subject=subject,
-            message=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.user.email],
-            html_message=html_content,
-            fail_silently=False,
-        )
-        logger.info(f'✅ Delivery invoice email sent to {order.user.email} for order #{order.id}')
+        email_outbox.enqueue(subject, text_content, [context['customer_email']], html_body=html_content)
+        logger.info(f'✅ Delivery invoice email queued for {context["customer_email"]} for order #{order.id}')
 
     except Exception as e:
         logger.error(f'Failed to send delivery invoice email for order #{order.id}: {str(e)}')
         raise
 
 
-def send_order_status_update_email(order, old_status=None):
+def _status_update_message(order, context, old_status=None):
+    status_label = ORDER_STATUS_LABELS.get(order.status, order.status)
+    html_content, text_content = render('emails/order_status_update.html', {
+        **context,
+        'status_label': status_label,
+        'old_status': old_status,
+    })
+    return {
+        'subject': f'Mise à jour de votre commande n°{order.order_number} - {status_label}',
+        'body': text_content,
+        'html_body': html_content,
+        'recipients': [context['customer_email']],
+    }
+
+
+def send_order_status_update_email(order, old_status=None, context=None):
     """
     Send email to customer when admin changes order status.
     Called on every status transition (confirmed, processing, shipped, delivered, cancelled).
     """
-    STATUS_LABELS = {
-        'confirmed': 'Confirmée',
-        'processing': 'En cours de traitement',
-        'shipped': 'Expédiée',
-        'delivered': 'Livrée',
-        'cancelled': 'Annulée',
-    }
-
-    status_label = STATUS_LABELS.get(order.status, order.status)
     if order.status == 'pending':
         return  # Don't send for pending status
 
     try:
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:3000')
-        subtotal = float(order.total_amount) - float(getattr(order, 'delivery_cost', 0) or 0)
-
-        subject = f'Mise à jour de votre commande n°{order.order_number} - {status_label}'
-        html_content = render_to_string('emails/order_status_update.html', {
-            'order': order,
-            'status_label': status_label,
-            'old_status': old_status,
-            'subtotal': subtotal,
-            'frontend_url': frontend_url,
-        })
-        text_content = strip_tags(html_content)
-
-        send_mail(
-            subject=subject,
-            message=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[order.user.email],
-            html_message=html_content,
-            fail_silently=False,
-        )
-        logger.info(f'✅ Status update email sent to {order.user.email} for order #{order.id} → {status_label}')
+        message = _status_update_message(order, context or order_context(order), old_status)
+        email_outbox.enqueue(**message)
+        status_label = ORDER_STATUS_LABELS.get(order.status, order.status)
+        logger.info(f'✅ Status update email queued for {message["recipients"][0]} for order #{order.id} → {status_label}')
 
     except Exception as e:
         logger.error(f'Failed to send status update email for order #{order.id}: {str(e)}')
         raise
 
 
+def send_order_status_update_emails(orders) -> int:
+    """
+    Batch version for a burst of status changes (orders or their ids): the
+    orders, customers and items are loaded in two queries, every e-mail is
+    rendered in one pass and the whole batch is queued with one INSERT.
+    """
+    messages = [
+        _status_update_message(context['order'], context)
+        for context in order_contexts(orders)
+        if context['order'].status != 'pending'
+    ]
+    email_outbox.enqueue_many(messages)
+    logger.info(f'✅ {len(messages)} status update email(s) queued')
+    return len(messages)
+
+
 def send_support_message_notification_email(message):
     """
     Send notification to developer when a new support message is created.
@@ -0,0 +1,175 @@
+"""
+Reader of the flat-file activity journal (logs/activity.log and its rotated
+files, written by accounts.activity) for GET /api/accounts/admin/journal/.
+
+The files are read backwards from the end in JOURNAL_BLOCK_SIZE blocks, newest
+entry first: the current file, then the rotated ones, newest first. A page
+costs O(page size) whatever the size of the journal. Filters only add the
+lines they skip.
+
+A cursor is the position where the previous page stopped: the inode of the
+file and the byte offset of the last line returned. The inode is used rather
+than the name because when the current file is rotated between two pages, its
+lines keep their inode under the new name.
+
+Filters:
+    action      exact action key
+    user        e-mail or name (case-insensitive substring)
+    date_from   YYYY-MM-DD, inclusive
+    date_to
+
+Lines are only roughly chronological: each process appends its own batches
+(accounts.activity), so an entry may follow a newer entry written by another
+worker. The scan therefore stops at the first entry older than date_from by
+more than JOURNAL_ORDER_GRACE, not at the first older entry.
+"""
+import base64
+import json
+import os
+from datetime import date, datetime, timedelta
+
+from .activity import ACTIVITY_LOG_PATH, rotated_logs
+
+JOURNAL_BLOCK_SIZE = 64 * 1024
+# Retard maximal d'une ligne sur les lignes écrites avant elle (lots par process)
+JOURNAL_ORDER_GRACE = timedelta(minutes=5)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class JournalFilter:
+    def __init__(self, action: str = '', user: str = '', date_from: date | None = None, date_to: date | None = None):
+        self.action = action
+        self.user = user.lower()
+        # Comparaison directe sur le texte ISO 8601 du champ `ts` (UTC)
+        self.ts_from = date_from.isoformat() if date_from else ''
+        self.ts_stop = (datetime.combine(date_from, datetime.min.time()) - JOURNAL_ORDER_GRACE).isoformat() if date_from else ''
+        self.ts_before = (date_to + timedelta(days=1)).isoformat() if date_to else ''
+        self._action_bytes = json.dumps(action).encode() if action else b''
+
+    @classmethod
+    def from_params(cls, params) -> 'JournalFilter':
+        """From the query string; raises ValueError on a malformed date."""
+        def day(name):
+            value = params.get(name, '').strip()
+            return date.fromisoformat(value) if value else None
+        return cls(
+            action=params.get('action', '').strip(),
+            user=params.get('user', '').strip(),
+            date_from=day('date_from'),
+            date_to=day('date_to'),
+        )
+
+    def quick_reject(self, line: bytes) -> bool:
+        # Avant json.loads : la plupart des lignes écartées ne sont jamais décodées
+        return bool(self._action_bytes) and self._action_bytes not in line
+
+    def matches(self, entry: dict) -> bool:
+        if self.action and entry.get('action') != self.action:
+            return False
+        if self.ts_from and entry.get('ts', '') < self.ts_from:
+            return False
+        if self.ts_before and entry.get('ts', '') >= self.ts_before:
+            return False
+        if self.user:
+            haystack = f"{entry.get('user_email', '')} {entry.get('user_name', '')}".lower()
+            if self.user not in haystack:
+                return False
+        return True
+
+    def past_range(self, entry: dict) -> bool:
+        """True once the scan is past date_from by more than JOURNAL_ORDER_GRACE: nothing older can match."""
+        return bool(self.ts_stop) and entry.get('ts', '') < self.ts_stop
+
+
+def encode_cursor(inode: int, offset: int, count: int) -> str:
+    payload = json.dumps({'i': inode, 'o': offset, 'n': count}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(encoded: str) -> tuple[int, int, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+        return int(payload['i']), int(payload['o']), int(payload['n'])
+    except (ValueError, KeyError, TypeError):
+        raise InvalidCursor(encoded)
+
+
+def _reverse_lines(f, end: int, block_size: int = JOURNAL_BLOCK_SIZE):
+    """(offset, line) of the lines of `f` that end before byte `end`, last one first."""
+    pos = end
+    head = b''
+    while pos > 0:
+        size = min(block_size, pos)
+        pos -= size
+        f.seek(pos)
+        chunk = f.read(size) + head
+        pieces = chunk.split(b'\n')
+        head = pieces.pop(0)  # ligne peut-être coupée par le bloc : complétée au tour suivant
+        line_end = pos + len(chunk)
+        for piece in reversed(pieces):
+            start = line_end - len(piece)
+            if piece:
+                yield start, piece
+            line_end = start - 1
+    if head:
+        yield 0, head
+
+
+def journal_files() -> list[str]:
+    files = rotated_logs()
+    if os.path.exists(ACTIVITY_LOG_PATH):
+        files.insert(0, ACTIVITY_LOG_PATH)
+    return files
+
+
+def read_journal(filters: JournalFilter, limit: int, cursor: str | None = None):
+    """
+    Up to `limit` matching entries, newest first, each with its position
+    number `n` (0 = newest). Returns (entries, next cursor or None).
+    """
+    files = journal_files()
+    start_inode = start_offset = None
+    count = 0
+    if cursor:
+        start_inode, start_offset, count = decode_cursor(cursor)
+
+    entries = []
+    position = None
+    started = cursor is None
+    for path in files:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            continue  # supprimé par la rotation entre-temps
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if not started:
+                if inode != start_inode:
+                    continue
+                started = True
+                end = start_offset
+            else:
+                end = os.fstat(f.fileno()).st_size
+            for offset, line in _reverse_lines(f, end):
+                if filters.quick_reject(line):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # ligne en cours d'écriture ou corrompue
+                if filters.past_range(entry):
+                    return entries, None
+                if not filters.matches(entry):
+                    continue
+                if len(entries) == limit:
+                    # Il en reste au moins une : la page suivante repart d'ici
+                    return entries, encode_cursor(*position, count + len(entries))
+                entry['n'] = count + len(entries)
+                entries.append(entry)
+                position = (inode, offset)
+    if not started:
+        raise InvalidCursor(cursor)
+    return entries, None
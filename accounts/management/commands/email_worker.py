@@ -0,0 +1,67 @@
+"""
+Django management command that sends the queued transactional e-mails
+(OutboxEmail, see accounts.email_outbox).
+
+The order endpoints only write the e-mail to the outbox; this worker claims
+the due ones in batches (SELECT ... FOR UPDATE SKIP LOCKED, so several
+workers can run side by side) and sends each batch through a single SMTP
+connection, retrying failures with an exponential backoff.
+
+Usage (on VPS):
+    python manage.py email_worker              # tourne en continu (systemd / supervisor)
+    python manage.py email_worker --once       # vide la file puis s'arrête (cron)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from accounts import email_outbox
+
+
+class Command(BaseCommand):
+    help = "Send the queued transactional e-mails"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Send the due e-mails then exit instead of polling forever',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds between two polls of an empty outbox (default: 2)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='E-mails sent per SMTP connection (default: 50)',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=15,
+            help='Requeue e-mails stuck in "sending" for this long (default: 15)',
+        )
+
+    def handle(self, *args, **options):
+        requeued = email_outbox.requeue_stale(options['stale_minutes'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"{requeued} e-mail(s) interrompu(s) remis en file."))
+
+        self.stdout.write("Worker d'envoi des e-mails démarré.")
+        while True:
+            close_old_connections()
+            emails = email_outbox.claim_batch(options['batch_size'])
+            if not emails:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            sent, failed = email_outbox.deliver(emails)
+            style = self.style.SUCCESS if not failed else self.style.WARNING
+            self.stdout.write(style(f"{sent} e-mail(s) envoyé(s), {failed} échec(s)."))
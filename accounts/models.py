@@ -1,9 +1,23 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils import timezone
 
 
-class CustomUserManager(BaseUserManager):
+class CustomUserQuerySet(models.QuerySet):
+    def with_order_stats(self):
+        """
+        Annotate order_count / order_total / last_order_at (read by UserSerializer)
+        in the same query as the users instead of three queries per user.
+        """
+        return self.annotate(
+            order_count=models.Count('user_orders'),
+            order_total=models.Sum('user_orders__total_amount'),
+            last_order_at=models.Max('user_orders__created_at'),
+        )
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
             raise ValueError('The Email field must be set')
@@ -94,7 +108,8 @@ class UserActivityLog(models.Model):
     description = models.TextField()
     target_user_email = models.EmailField(blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Heure de l'action, pas de l'écriture différée (accounts.activity)
+    created_at = models.DateTimeField(default=timezone.now)
 
     class Meta:
         ordering = ['-created_at']
@@ -103,3 +118,37 @@ class UserActivityLog(models.Model):
 
     def __str__(self):
         return f'{self.action} — {self.user} — {self.created_at}'
+
+
+class OutboxEmail(models.Model):
+    """E-mail transactionnel en attente d'envoi (accounts.email_outbox, commande email_worker)."""
+    STATUS_CHOICES = [
+        ('pending', 'En attente'),
+        ('sending', 'En cours d\'envoi'),
+        ('sent', 'Envoyé'),
+        ('failed', 'Échoué'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=255)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+        ]
+        verbose_name = "E-mail en file d'envoi"
+        verbose_name_plural = "File d'envoi des e-mails"
+
+    def __str__(self):
+        return f'{self.subject} → {", ".join(self.recipients)} ({self.status})'
@@ -74,25 +74,28 @@ class UserSerializer(serializers.ModelSerializer):
     def get_type(self, obj):
         return 'particulier'
 
+    @staticmethod
+    def _order_stats(obj):
+        """Read the with_order_stats() annotations, or fetch them in one query for a single user."""
+        if not hasattr(obj, 'order_count'):
+            from django.db.models import Count, Max, Sum
+            stats = obj.user_orders.aggregate(
+                order_count=Count('id'), order_total=Sum('total_amount'), last_order_at=Max('created_at'),
+            )
+            for name, value in stats.items():
+                setattr(obj, name, value)
+        return obj.order_count, obj.order_total, obj.last_order_at
+
     def get_totalCommandes(self, obj):
-        return getattr(obj, 'user_orders', obj.order_set if hasattr(obj, 'order_set') else None) and \
-               getattr(obj, 'user_orders', obj.order_set if hasattr(obj, 'order_set') else None).count() or 0
+        return self._order_stats(obj)[0] or 0
 
     def get_montantTotal(self, obj):
-        try:
-            orders = obj.user_orders.all() if hasattr(obj, 'user_orders') else []
-            return sum(float(o.total_amount or 0) for o in orders)
-        except Exception:
-            return 0
+        return float(self._order_stats(obj)[1] or 0)
 
     def get_derniereCommande(self, obj):
-        try:
-            orders = obj.user_orders.order_by('-created_at') if hasattr(obj, 'user_orders') else []
-            last = orders.first()
-            if last:
-                return last.created_at.strftime('%d/%m/%Y')
-        except Exception:
-            pass
+        last_order_at = self._order_stats(obj)[2]
+        if last_order_at:
+            return last_order_at.strftime('%d/%m/%Y')
         return 'Aucune'
 
     def get_firstName(self, obj):
@@ -112,3 +115,27 @@ class UserSerializer(serializers.ModelSerializer):
         if role in ('admin', 'sales', 'purchasing', 'responsable_achats'):
             return role
         return 'customer'
+
+
+class OrderUserSerializer(serializers.ModelSerializer):
+    """
+    Client d'une commande (OrderSerializer.user) : identité seulement, sans les
+    statistiques de commandes de UserSerializer — aucune requête par commande.
+    """
+    firstName = serializers.SerializerMethodField()
+    lastName = serializers.SerializerMethodField()
+    telephone = serializers.CharField(source='phone', read_only=True)
+    adresse = serializers.CharField(source='address', read_only=True)
+
+    class Meta:
+        model = CustomUser
+        fields = [
+            'id', 'email', 'username', 'first_name', 'last_name',
+            'firstName', 'lastName', 'phone', 'address', 'telephone', 'adresse', 'role',
+        ]
+
+    def get_firstName(self, obj):
+        return obj.first_name or obj.email.split('@')[0]
+
+    def get_lastName(self, obj):
+        return obj.last_name or ''
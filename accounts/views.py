@@ -222,7 +222,7 @@ def verify_reset_token(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def clients_list(request):
-    clients = CustomUser.objects.filter(role='customer')
+    clients = CustomUser.objects.filter(role='customer').with_order_stats()
     serializer = UserSerializer(clients, many=True)
     return Response(serializer.data)
 
@@ -245,7 +245,7 @@ def list_staff_users(request):
         users = users.filter(role=role)
 
     print(f'Query: {role}, Found {users.count()} users with role: {role}')
-    serializer = UserSerializer(users, many=True)
+    serializer = UserSerializer(users.with_order_stats(), many=True)
     data = serializer.data
     # Ajoute plain_password à chaque utilisateur pour la visibilité admin
     users_list = list(users.values('id', 'plain_password'))
@@ -407,75 +407,81 @@ def toggle_user_active(request, user_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_activity_logs(request):
-    """GET /api/accounts/admin/journal/ — Read from flat-file log (falls back to DB)."""
+    """
+    GET /api/accounts/admin/journal/ — Read from flat-file log (falls back to DB).
+
+    Filters: ?action=update_price &user=<email or name> &date_from=YYYY-MM-DD &date_to=YYYY-MM-DD
+    ?pagination=cursor&page_size=100 → {"next", "previous", "results"}: follow `next`
+    (each page costs O(page size), see accounts.journal). Without it, the last
+    1000 entries as a list, like before.
+    """
     if not _is_admin(request.user):
         return Response({'error': 'Non autorisé'}, status=status.HTTP_403_FORBIDDEN)
 
-    # ── Try flat-file first ────────────────────────────────────────────────────
-    import json as _json
     import os as _os
-    from .activity import ACTIVITY_LOG_PATH
-
-    ACTION_LABELS = {
-        'login': 'Connexion',
-        'create_user': 'Création utilisateur',
-        'update_user': 'Modification utilisateur',
-        'delete_user': 'Suppression utilisateur',
-        'toggle_user': 'Activation/désactivation utilisateur',
-        'confirm_order': 'Validation commande',
-        'cancel_order': 'Annulation commande',
-        'create_invoice': 'Création facture',
-        'create_delivery': 'Création livraison',
-        'update_delivery': 'Mise à jour livraison',
-        'create_bon': 'Création bon de commande',
-        'add_stock': 'Ajout stock',
-        'adjust_stock': 'Ajustement stock',
-        'create_purchase': 'Commande achat',
-        'sav_update': 'Mise à jour SAV',
-        'add_product': 'Ajout article',
-        'update_product': 'Modification article',
-        'delete_product': 'Suppression article',
-        'update_price': 'Modification prix',
-        'dot_sale': 'Vente DOT',
-        'other': 'Autre',
-    }
+    from pneushop.pagination import KeysetPagination, wants_keyset
+    from .activity import ACTIVITY_LOG_PATH, flush
+    from .journal import InvalidCursor, JournalFilter, read_journal
+
+    flush()  # entrées encore en file dans ce process
+
+    ACTION_LABELS = dict(UserActivityLog.ACTION_CHOICES)
+    try:
+        filters = JournalFilter.from_params(request.query_params)
+    except ValueError:
+        return Response({'error': 'Date invalide (format AAAA-MM-JJ).'}, status=status.HTTP_400_BAD_REQUEST)
+    paginated = wants_keyset(request)
+    paginator = KeysetPagination()
 
+    # ── Flat-file first ───────────────────────────────────────────────────────
     if _os.path.exists(ACTIVITY_LOG_PATH):
+        limit = paginator.get_page_size(request) if paginated else 1000
         try:
-            with open(ACTIVITY_LOG_PATH, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            data = []
-            for i, line in enumerate(reversed(lines[-1000:])):
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = _json.loads(line)
-                    action = entry.get('action', 'other')
-                    extra = entry.get('extra') or {}
-                    desc = entry.get('description', '')
-                    if extra:
-                        extra_str = ' | '.join(f'{k}: {v}' for k, v in extra.items())
-                        desc = f'{desc} — {extra_str}' if extra_str else desc
-                    data.append({
-                        'id': i,
-                        'user_email': entry.get('user_email', '—'),
-                        'user_name': entry.get('user_name', '—'),
-                        'action': action,
-                        'action_label': ACTION_LABELS.get(action, action),
-                        'description': desc,
-                        'target_user_email': entry.get('target_email', ''),
-                        'ip_address': entry.get('ip', None) or None,
-                        'created_at': entry.get('ts', ''),
-                    })
-                except Exception:
-                    continue
+            entries, next_cursor = read_journal(filters, limit, request.query_params.get('cursor'))
+        except InvalidCursor:
+            return Response({'error': 'Curseur invalide.'}, status=status.HTTP_404_NOT_FOUND)
+        data = []
+        for entry in entries:
+            action = entry.get('action', 'other')
+            extra = entry.get('extra') or {}
+            desc = entry.get('description', '')
+            if extra:
+                extra_str = ' | '.join(f'{k}: {v}' for k, v in extra.items())
+                desc = f'{desc} — {extra_str}' if extra_str else desc
+            data.append({
+                'id': entry['n'],
+                'user_email': entry.get('user_email', '—'),
+                'user_name': entry.get('user_name', '—'),
+                'action': action,
+                'action_label': ACTION_LABELS.get(action, action),
+                'description': desc,
+                'target_user_email': entry.get('target_email', ''),
+                'ip_address': entry.get('ip', None) or None,
+                'created_at': entry.get('ts', ''),
+            })
+        if not paginated:
             return Response(data)
-        except Exception:
-            pass
+        next_link = None
+        if next_cursor:
+            from rest_framework.pagination import replace_query_param
+            next_link = replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor)
+        return Response({'next': next_link, 'previous': None, 'results': data})
 
     # ── Fallback: DB ──────────────────────────────────────────────────────────
-    logs = UserActivityLog.objects.select_related('user').order_by('-created_at')[:500]
+    logs = UserActivityLog.objects.select_related('user').order_by('-created_at')
+    if filters.action:
+        logs = logs.filter(action=filters.action)
+    if filters.user:
+        from django.db.models import Q
+        logs = logs.filter(
+            Q(user__email__icontains=filters.user) | Q(user__first_name__icontains=filters.user)
+            | Q(user__last_name__icontains=filters.user)
+        )
+    if filters.ts_from:
+        logs = logs.filter(created_at__date__gte=filters.ts_from)
+    if filters.ts_before:
+        logs = logs.filter(created_at__date__lt=filters.ts_before)
+    logs = paginator.paginate_queryset(logs, request) if paginated else logs[:500]
     data = [
         {
             'id': log.id,
@@ -492,4 +498,4 @@ def list_activity_logs(request):
         }
         for log in logs
     ]
-    return Response(data)
+    return paginator.get_paginated_response(data) if paginated else Response(data)
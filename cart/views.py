@@ -142,9 +142,11 @@ def checkout_cart(request):
 
     from django.apps import apps
     Order = apps.get_model('orders', 'Order')
+    from orders.sequences import next_order_number
 
     with transaction.atomic():
         order = Order.objects.create(
+            order_number=next_order_number(),
             user=request.user,
             shipping_address=shipping_address,
             notes=notes,
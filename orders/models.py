@@ -95,6 +95,12 @@ class Order(models.Model):
 
     commercial = models.CharField(max_length=255, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            # Pagination par curseur (created_at, id) — voir pneushop.pagination
+            models.Index(fields=['-created_at', '-id'], name='order_created_id_idx'),
+        ]
+
     def __str__(self):
         return f'{self.order_number} - {self.user.email}'
 
@@ -282,3 +288,16 @@ class WarrantyClaimTireImage(models.Model):
 
     def __str__(self):
         return f'TireImage {self.id} — SAV-{self.claim_id:04d}'
+
+
+class DocumentSequence(models.Model):
+    """Compteur de numérotation d'un type de document (CPS26, AV26, ACH-102026-…) — voir orders/sequences.py."""
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Séquence de numérotation'
+        verbose_name_plural = 'Séquences de numérotation'
+
+    def __str__(self):
+        return f'{self.name} = {self.value}'
@@ -0,0 +1,111 @@
+"""
+Shared numbering of the business documents:
+
+    client orders       CPS{yy}000001         next_order_number()
+    credit notes        AV{yy}000001          next_avoir_number()
+    purchase orders     ACH-{mm}{yyyy}-0001   next_purchase_number()
+
+Each sequence costs O(1) per number — no MAX() / COUNT() over the
+documents, except once to seed a new sequence from the numbers already
+issued under the former scheme.
+
+PostgreSQL: one database SEQUENCE per name ("docseq_cps26"...), read with
+nextval() on the request's own connection — no extra connection, no
+round-trip besides the SELECT. nextval() is outside the transaction, so
+parallel writers never receive the same number, even when the document's
+transaction rolls back: that number is skipped (gaps, never duplicates).
+The sequence is created on first use (CREATE SEQUENCE IF NOT EXISTS),
+starting after the last number issued or reserved in DocumentSequence.
+SQLite (dev): a DocumentSequence counter row bumped one number at a time on
+the request's connection — the database only has one writer anyway.
+"""
+import re
+
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+_created: set[str] = set()  # séquences PostgreSQL dont la création est validée (commit)
+
+
+def _reserve(db, name: str, count: int, seed) -> int:
+    """Add `count` to the `name` counter (created from seed() if missing) and return its new value."""
+    table = db.ops.quote_name(DocumentSequence._meta.db_table)
+    with db.cursor() as cursor:
+        cursor.execute(f'UPDATE {table} SET value = value + %s WHERE name = %s RETURNING value', [count, name])
+        row = cursor.fetchone()
+        if row is None:
+            # Nouvelle séquence : on repart du dernier numéro déjà émis
+            start = seed() if seed else 0
+            cursor.execute(
+                f'INSERT INTO {table} (name, value) VALUES (%s, %s) '
+                f'ON CONFLICT (name) DO UPDATE SET value = {table}.value + %s RETURNING value',
+                [name, start + count, count],
+            )
+            row = cursor.fetchone()
+    return row[0]
+
+
+def _sequence_name(name: str) -> str:
+    """"ACH-102026-" → "docseq_ach_102026_"."""
+    return 'docseq_' + re.sub(r'[^a-z0-9]', '_', name.lower())
+
+
+def _create_sequence(sequence: str, name: str, seed):
+    """CREATE SEQUENCE starting after the last number issued (former scheme) or reserved (counter row)."""
+    start = seed() if seed else 0
+    counter = DocumentSequence.objects.filter(name=name).values_list('value', flat=True).first()
+    start = max(start, counter or 0) + 1
+    try:
+        # Point de sauvegarde : une création concurrente du même nom ne casse pas la transaction
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'CREATE SEQUENCE IF NOT EXISTS {connection.ops.quote_name(sequence)} START WITH {int(start)}')
+    except IntegrityError:
+        pass  # créée au même moment par un autre process
+    # Connue seulement une fois validée : annulée avec la transaction, elle sera recréée
+    transaction.on_commit(lambda: _created.add(sequence))
+
+
+def next_value(name: str, seed=None) -> int:
+    """Next integer of the `name` sequence. seed() returns the last value already used, read once."""
+    if connection.vendor == 'sqlite':
+        return _reserve(connection, name, 1, seed)
+
+    sequence = _sequence_name(name)
+    if sequence not in _created:
+        _create_sequence(sequence, name, seed)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT nextval(%s)', [connection.ops.quote_name(sequence)])
+        return cursor.fetchone()[0]
+
+
+def last_issued(queryset, field: str, prefix: str) -> int:
+    """Highest numeric suffix already issued under `prefix` (former numbering, zero-padded)."""
+    last = queryset.filter(**{f'{field}__startswith': prefix}).order_by(f'-{field}').values_list(field, flat=True).first()
+    try:
+        return int(last[len(prefix):]) if last else 0
+    except ValueError:
+        return 0
+
+
+def document_number(prefix: str, width: int, queryset, field: str, name: str = '') -> str:
+    """`prefix` + the next value of the `name` sequence (default: the prefix itself), zero-padded."""
+    value = next_value(name or prefix, seed=lambda: last_issued(queryset, field, prefix))
+    return f'{prefix}{value:0{width}d}'
+
+
+def next_order_number() -> str:
+    from .models import Order
+    return document_number(f"CPS{timezone.now().strftime('%y')}", 6, Order.objects.all(), 'order_number')
+
+
+def next_avoir_number() -> str:
+    from .models import Avoir
+    return document_number(f"AV{timezone.now().strftime('%y')}", 6, Avoir.objects.all(), 'avoir_number')
+
+
+def next_purchase_number() -> str:
+    from purchases.models import PurchaseOrder
+    now = timezone.now()
+    return document_number(f'ACH-{now.month:02d}{now.year}-', 4, PurchaseOrder.objects.all(), 'order_number')
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import Delivery, Order, OrderItem, PurchaseOrder, PurchaseOrderItem, CRIBalance, Avoir, AvoirItem
-from accounts.serializers import UserSerializer
+from .sequences import next_avoir_number, next_order_number
+from accounts.serializers import OrderUserSerializer
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -13,7 +14,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = OrderUserSerializer(read_only=True)
     items = OrderItemSerializer(many=True, read_only=False, required=False)
     order_number = serializers.CharField(read_only=True)
     warranty = serializers.JSONField(required=False, write_only=True)
@@ -42,7 +43,6 @@ class OrderSerializer(serializers.ModelSerializer):
         return attrs
 
     def create(self, validated_data):
-        from django.utils import timezone
         from decimal import Decimal
 
         items_data = validated_data.pop('items', [])
@@ -53,6 +53,7 @@ class OrderSerializer(serializers.ModelSerializer):
             validated_data['warranty_vehicle_registration'] = warranty_data.get('vehicleRegistration', '')
             validated_data['warranty_vehicle_mileage'] = warranty_data.get('vehicleMileage', '')
 
+        validated_data['order_number'] = next_order_number()
         order = Order.objects.create(**validated_data)
 
         if order.payment_method in ('cri', 'mixed') and order.cri_remaining > 0:
@@ -61,24 +62,6 @@ class OrderSerializer(serializers.ModelSerializer):
             cri_balance.balance = cri_balance.balance + Decimal(str(order.cri_remaining))
             cri_balance.save()
 
-        if not order.order_number:
-            year = timezone.now().strftime('%y')
-            prefix = f'CPS{year}'
-            last_order = Order.objects.filter(
-                order_number__startswith=prefix
-            ).order_by('-order_number').first()
-
-            if last_order and last_order.order_number:
-                try:
-                    last_seq = int(last_order.order_number[len(prefix):])
-                except (ValueError, IndexError):
-                    last_seq = 0
-            else:
-                last_seq = 0
-
-            order.order_number = f'{prefix}{last_seq + 1:06d}'
-            order.save()
-
         for item in items_data:
             OrderItem.objects.create(order=order, **item)
 
@@ -323,26 +306,13 @@ class AvoirSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         from products.models import Product
-        from django.utils import timezone
         from django.db import transaction
 
         items_data = validated_data.pop('items_data', [])
 
         with transaction.atomic():
-            avoir = Avoir.objects.create(**validated_data)
-
-            # Générer le numéro d'avoir: AV{YY}{000001}
-            year = timezone.now().strftime('%y')
-            prefix = f'AV{year}'
-            last = Avoir.objects.filter(avoir_number__startswith=prefix).order_by('-avoir_number').first()
-            if last and last.avoir_number:
-                try:
-                    last_seq = int(last.avoir_number[len(prefix):])
-                except (ValueError, IndexError):
-                    last_seq = 0
-            else:
-                last_seq = 0
-            avoir.avoir_number = f'{prefix}{last_seq + 1:06d}'
+            # Numéro d'avoir AV{YY}{000001} (orders/sequences.py)
+            avoir = Avoir.objects.create(avoir_number=next_avoir_number(), **validated_data)
 
             total = 0
             for item_data in items_data:
@@ -13,6 +13,7 @@ urlpatterns = [
     path('sav/<int:pk>/', views.warranty_claim_detail_view, name='sav-detail'),
     path('', views.OrderListCreateView.as_view(), name='orders-list'),
     path('cri-balance/', views.get_cri_balance, name='cri-balance'),
+    path('treasury/export/', views.treasury_export, name='treasury-export'),
     path('<int:pk>/', views.OrderDetailView.as_view(), name='order-detail'),
     path('<int:pk>/upload-payment-image/', views.upload_payment_image, name='upload-payment-image'),
     path('<int:pk>/confirm-with-dot/', views.confirm_with_dot, name='confirm-with-dot'),
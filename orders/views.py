@@ -7,6 +7,7 @@ from .serializers import DeliverySerializer, OrderSerializer, PurchaseOrderSeria
 from rest_framework.permissions import IsAuthenticated
 from accounts.permanent_permissions import IsAdmin, IsAdminOrSales, IsAdminOrSalesOrOwner
 from accounts.activity import log_activity
+from pneushop.pagination import KeysetPaginationMixin
 
 
 class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -16,6 +17,7 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def perform_update(self, serializer):
         from accounts.email_utils import send_order_status_update_email, send_delivery_invoice_email
+        from accounts.email_rendering import order_context
         from decimal import Decimal
         from django.utils import timezone
         from django.db import transaction
@@ -29,33 +31,40 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
 
             order = serializer.save()
 
-        # Si les frais de livraison ont changé → recalculer le total_amount
-        new_delivery_cost = order.delivery_cost or Decimal('0')
-        if new_delivery_cost != old_delivery_cost:
-            items_total = sum(
-                item.unit_price * item.quantity for item in order.items.all()
-            )
-            order.total_amount = items_total + new_delivery_cost
-            order.save(update_fields=['total_amount'])
+            # Si les frais de livraison ont changé → recalculer le total_amount
+            new_delivery_cost = order.delivery_cost or Decimal('0')
+            if new_delivery_cost != old_delivery_cost:
+                items_total = sum(
+                    item.unit_price * item.quantity for item in order.items.all()
+                )
+                order.total_amount = items_total + new_delivery_cost
+                order.save(update_fields=['total_amount'])
+
+            # E-mails mis en file dans la même transaction (envoyés par email_worker)
+            try:
+                email_context = order_context(order)
+                send_order_status_update_email(order, context=email_context)
+            except Exception as e:
+                email_context = None
+                print(f'[ORDER UPDATE] Failed to queue status update email: {str(e)}')
+            if order.status == 'delivered' and old_status != 'delivered':
+                try:
+                    send_delivery_invoice_email(order, email_context)
+                except Exception as e:
+                    print(f'[ORDER UPDATE] Failed to queue delivery invoice email: {str(e)}')
 
         # ── Décrémenter le stock à la confirmation de la commande ────────
         CONFIRMED_STATUSES = ('confirmed', 'processing', 'shipped', 'delivered')
         if order.status in CONFIRMED_STATUSES and old_status not in CONFIRMED_STATUSES:
-            from products.models import Product
-            from django.db import transaction
+            from products.stock import decrement_for_order
             try:
-                with transaction.atomic():
-                    for item_data in order.items.all():
-                        try:
-                            product = Product.objects.select_for_update().get(pk=item_data.product_id)
-                            if product.stock >= item_data.quantity:
-                                product.stock -= item_data.quantity
-                                product.save(update_fields=['stock'])
-                                print(f'[ORDER CONFIRM] Stock decremented: {product.name} -{item_data.quantity} → {product.stock}')
-                            else:
-                                print(f'[ORDER CONFIRM] WARNING: Insufficient stock for {product.name}. Available: {product.stock}, Ordered: {item_data.quantity}')
-                        except Product.DoesNotExist:
-                            print(f'[ORDER CONFIRM] WARNING: Product ID {item_data.product_id} not found')
+                reservation = decrement_for_order(order, user=self.request.user)
+                for product, quantity in reservation.decremented:
+                    print(f'[ORDER CONFIRM] Stock decremented: {product.name} -{quantity} → {product.stock}')
+                for product, quantity in reservation.insufficient:
+                    print(f'[ORDER CONFIRM] WARNING: Insufficient stock for {product.name}. Available: {product.stock}, Ordered: {quantity}')
+                for product_id in reservation.missing:
+                    print(f'[ORDER CONFIRM] WARNING: Product ID {product_id} not found')
             except Exception as e:
                 print(f'[ORDER CONFIRM] Failed to decrement stock: {e}')
 
@@ -80,16 +89,6 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
             except Exception as e:
                 print(f'[ORDER UPDATE] Failed to sync delivery status: {e}')
 
-        try:
-            send_order_status_update_email(order)
-        except Exception as e:
-            print(f'[ORDER UPDATE] Failed to send status update email: {str(e)}')
-        if order.status == 'delivered' and old_status != 'delivered':
-            try:
-                send_delivery_invoice_email(order)
-            except Exception as e:
-                print(f'[ORDER UPDATE] Failed to send delivery invoice email: {str(e)}')
-
         # ── Journal d'activité (staff uniquement) ────────────────────────
         try:
             actor = self.request.user
@@ -178,7 +177,31 @@ class OrderDetailView(generics.RetrieveUpdateDestroyAPIView):
             print(f'[AUTO-DELIVERY] Created Delivery {delivery.id} for Order {order.order_number}, suivi: {tracking}')
 
 
-class OrderListCreateView(generics.ListCreateAPIView):
+def filter_orders(queryset, params):
+    """Filtres communs à la liste des commandes et à l'export trésorerie."""
+    status = params.get('status')
+    payment_status = params.get('payment_status')
+    payment_method = params.get('payment_method')
+    date_from = params.get('date_from')
+    date_to = params.get('date_to')
+    order_number = params.get('order_number')
+
+    if status:
+        queryset = queryset.filter(status=status)
+    if payment_status:
+        queryset = queryset.filter(payment_status=payment_status)
+    if payment_method:
+        queryset = queryset.filter(payment_method=payment_method)
+    if date_from:
+        queryset = queryset.filter(created_at__date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(created_at__date__lte=date_to)
+    if order_number:
+        queryset = queryset.filter(order_number__icontains=order_number)
+    return queryset
+
+
+class OrderListCreateView(KeysetPaginationMixin, generics.ListCreateAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
@@ -192,38 +215,18 @@ class OrderListCreateView(generics.ListCreateAPIView):
         user = self.request.user
         if not user or not user.is_authenticated:
             return Order.objects.none()
-        params = self.request.query_params
         if user.is_staff or user.is_superuser or getattr(user, 'role', None) in ('admin', 'sales'):
-            queryset = Order.objects.all().prefetch_related('items').select_related('user').order_by('-created_at')
+            queryset = Order.objects.all().prefetch_related('items').select_related('user').order_by('-created_at', '-id')
         else:
-            queryset = Order.objects.filter(user=user).prefetch_related('items').select_related('user').order_by('-created_at')
-
-        status = params.get('status')
-        payment_status = params.get('payment_status')
-        payment_method = params.get('payment_method')
-        date_from = params.get('date_from')
-        date_to = params.get('date_to')
-        order_number = params.get('order_number')
-
-        if status:
-            queryset = queryset.filter(status=status)
-        if payment_status:
-            queryset = queryset.filter(payment_status=payment_status)
-        if payment_method:
-            queryset = queryset.filter(payment_method=payment_method)
-        if date_from:
-            queryset = queryset.filter(created_at__date__gte=date_from)
-        if date_to:
-            queryset = queryset.filter(created_at__date__lte=date_to)
-        if order_number:
-            queryset = queryset.filter(order_number__icontains=order_number)
-
-        return queryset
+            queryset = Order.objects.filter(user=user).prefetch_related('items').select_related('user').order_by('-created_at', '-id')
+        return filter_orders(queryset, self.request.query_params)
 
     def paginate_queryset(self, queryset):
         """
         Si ?no_pagination=true est passé (utilisé par la trésorerie pour tout récupérer),
         on désactive la pagination et on retourne toutes les commandes.
+        Pour les gros volumes, préférer ?pagination=cursor&page_size=500 et suivre
+        `next` (voir pneushop.pagination) : chaque page coûte le même temps.
         """
         if self.request.query_params.get('no_pagination', '').lower() == 'true':
             return None
@@ -232,7 +235,7 @@ class OrderListCreateView(generics.ListCreateAPIView):
     def perform_create(self, serializer):
         from django.utils import timezone
         from django.db import transaction
-        from accounts.email_utils import send_order_confirmation_email, send_new_order_notification_email
+        from accounts.email_utils import send_new_order_emails
         from django.contrib.auth import get_user_model
         User = get_user_model()
 
@@ -264,15 +267,11 @@ class OrderListCreateView(generics.ListCreateAPIView):
                 order.tracking_number = f"TRK-{order.id:06d}"
                 order.save()
 
-        try:
-            send_order_confirmation_email(order)
-        except Exception as e:
-            print(f'[ORDER CREATE] Failed to send confirmation email: {str(e)}')
-
-        try:
-            send_new_order_notification_email(order)
-        except Exception as e:
-            print(f'[ORDER CREATE] Failed to send sales notification email: {str(e)}')
+            # E-mails mis en file dans la même transaction (envoyés par email_worker)
+            try:
+                send_new_order_emails(order)
+            except Exception as e:
+                print(f'[ORDER CREATE] Failed to queue order emails: {str(e)}')
 
 
 class PurchaseOrderViewSet(viewsets.ModelViewSet):
@@ -393,6 +392,94 @@ def get_cri_balance(request):
     return Response({'balance': float(balance_obj.balance), 'updated_at': balance_obj.updated_at})
 
 
+# Colonnes de l'export trésorerie : identification + champs de paiement par mode
+TREASURY_EXPORT_FIELDS = [
+    'id', 'order_number', 'created_at', 'status', 'payment_status', 'payment_method',
+    'total_amount', 'delivery_cost', 'commercial', 'user__email', 'shipping_address',
+    'cri_amount_paid', 'cri_remaining', 'cri_remarque',
+    'transfer_number', 'transfer_holder_name', 'transfer_bank_name', 'transfer_image',
+    'transfer_amount_paid', 'transfer_remaining', 'transfer_remarque',
+    'lettre_number', 'lettre_date', 'lettre_name', 'lettre_bank_name', 'lettre_rib', 'lettre_lieu',
+    'lettre_image', 'lettre_amount_paid', 'lettre_remaining', 'lettre_remarque',
+    'cheque_number', 'cheque_date', 'cheque_name', 'cheque_bank_name', 'cheque_image',
+    'cheque_amount_paid', 'cheque_remaining', 'cheque_remarque',
+    'cod_authorization_number', 'cod_bank_name', 'cod_amount_paid', 'cod_remaining', 'cod_remarque',
+    'especes_amount_paid', 'especes_remaining', 'especes_remarque',
+]
+TREASURY_EXPORT_CHUNK_SIZE = 2000
+
+
+@api_view(['GET'])
+@perm_classes([IsAdminOrSales])
+def treasury_export(request):
+    """
+    GET /api/orders/treasury/export/?output=ndjson|csv
+    Stream every order (payment fields only) for the treasury screen, one
+    line at a time: memory stays flat whatever the number of orders.
+    Accepts the same filters as the order list (status, payment_status,
+    payment_method, date_from, date_to, order_number).
+    """
+    import csv
+    import json
+    from django.core.serializers.json import DjangoJSONEncoder
+    from django.db.models import IntegerField, OuterRef, Subquery, Sum
+    from django.db.models.functions import Coalesce
+    from django.http import StreamingHttpResponse
+    from django.utils import timezone
+    from .models import OrderItem
+
+    output = request.query_params.get('output', 'ndjson').lower()
+    if output not in ('ndjson', 'csv'):
+        return Response({'error': "output doit être 'ndjson' ou 'csv'"}, status=400)
+
+    # Quantité totale d'articles (frais de livraison × quantité côté trésorerie),
+    # en sous-requête pour ne pas charger les lignes de commande
+    items_quantity = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by().values('order').annotate(total=Sum('quantity')).values('total')
+    )
+    fields = TREASURY_EXPORT_FIELDS + ['items_quantity']
+    rows = (
+        filter_orders(Order.objects.all(), request.query_params)
+        .annotate(items_quantity=Coalesce(Subquery(items_quantity, output_field=IntegerField()), 0))
+        .order_by('-created_at', '-id')
+        .values(*fields)
+        .iterator(chunk_size=TREASURY_EXPORT_CHUNK_SIZE)
+    )
+
+    if output == 'csv':
+        class Echo:
+            def write(self, value):
+                return value
+
+        writer = csv.writer(Echo())
+
+        def cell(value):
+            if isinstance(value, (dict, list)):
+                return json.dumps(value, ensure_ascii=False)
+            return '' if value is None else value
+
+        def stream():
+            yield '\ufeff'  # BOM : accents lisibles dans Excel
+            yield writer.writerow(fields)
+            for row in rows:
+                yield writer.writerow([cell(row[field]) for field in fields])
+
+        content_type, extension = 'text/csv; charset=utf-8', 'csv'
+    else:
+        def stream():
+            for row in rows:
+                yield json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+        content_type, extension = 'application/x-ndjson; charset=utf-8', 'ndjson'
+
+    filename = f'tresorerie_{timezone.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+    response = StreamingHttpResponse(stream(), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
 def _serialize_claim(claim, request):
     """Return a dict representation of a WarrantyClaim."""
     STATUS_LABELS = {
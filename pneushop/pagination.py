@@ -0,0 +1,215 @@
+"""
+Keyset (cursor) pagination, opt-in on the large listings.
+
+    GET /api/products/?pagination=cursor&ordering=price&page_size=100
+    GET /api/orders/?pagination=cursor&page_size=500     (trésorerie, exports)
+
+Instead of COUNT(*) + OFFSET, each page is fetched with a WHERE on the last
+row seen, over the current ordering plus `id` as tie-breaker:
+    (created_at, id) < (:created_at, :id)
+so page 1000 costs the same as page 1. The response has no `count`:
+    {"next": url | null, "previous": url | null, "results": [...]}
+and the client simply follows `next` until it is null.
+
+Without ?pagination=cursor (or ?cursor=) the views keep the global
+PageNumberPagination.
+"""
+import base64
+import datetime
+import decimal
+import json
+import uuid
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, replace_query_param, remove_query_param
+from rest_framework.response import Response
+
+
+class _CursorEncoder(json.JSONEncoder):
+    # Full precision: DjangoJSONEncoder would cut datetimes to milliseconds
+    # and the cursor row would no longer compare equal to itself
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.date, datetime.time)):
+            return o.isoformat()
+        if isinstance(o, (decimal.Decimal, uuid.UUID)):
+            return str(o)
+        return super().default(o)
+
+
+def wants_keyset(request) -> bool:
+    params = request.query_params
+    return params.get('pagination') == 'cursor' or 'cursor' in params
+
+
+class KeysetPagination(BasePagination):
+    page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Curseur invalide.'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    @staticmethod
+    def get_ordering(queryset) -> list[str]:
+        """Current ORDER BY (after OrderingFilter & co.) + pk as the unique tie-breaker."""
+        ordering = [
+            field for field in (queryset.query.order_by or queryset.model._meta.ordering or [])
+            if isinstance(field, str) and field.lstrip('-') not in ('pk', 'id', '?')
+        ]
+        descending = ordering[0].startswith('-') if ordering else True
+        return ordering + ['-pk' if descending else 'pk']
+
+    # ─── Cursor ──────────────────────────────────────────────────────────────
+
+    def encode_cursor(self, values: list, reverse: bool) -> str:
+        payload = json.dumps({'v': values, 'r': int(reverse)}, cls=_CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, n_fields: int):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != n_fields:
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    @staticmethod
+    def _value(obj, field: str):
+        for attr in field.lstrip('-').split('__'):
+            obj = getattr(obj, 'pk' if attr == 'pk' else attr, None)
+            if obj is None:
+                return None
+        return getattr(obj, 'pk', obj) if hasattr(obj, '_meta') else obj
+
+    # ─── Query ───────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _order_by(ordering, reverse: bool):
+        # NULLs always last in the forward direction, whatever the database default
+        exprs = []
+        for field in ordering:
+            descending = field.startswith('-') != reverse
+            name = field.lstrip('-')
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            exprs.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+        return exprs
+
+    @staticmethod
+    def _after(ordering, values, reverse: bool) -> Q:
+        """
+        Rows strictly after `values` in `ordering` (before, if reverse):
+            f1 > v1  OR  (f1 = v1 AND f2 > v2)  OR  ...
+        """
+        branches = []
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            value = values[i]
+            descending = field.startswith('-') != reverse
+            equal = [
+                Q(**{f'{prev.lstrip("-")}__isnull': True}) if values[j] is None else Q(**{prev.lstrip('-'): values[j]})
+                for j, prev in enumerate(ordering[:i])
+            ]
+            if value is None:
+                # NULLs come last: only other NULLs (handled by later fields) follow —
+                # walking backwards, every non-NULL row precedes
+                if not reverse:
+                    continue
+                beyond = Q(**{f'{name}__isnull': False})
+            else:
+                beyond = Q(**{f'{name}__lt' if descending else f'{name}__gt': value})
+                if not reverse and name != 'pk':
+                    beyond |= Q(**{f'{name}__isnull': True})
+            branches.append(reduce(and_, equal, Q()) & beyond)
+        return reduce(or_, branches) if branches else Q(pk__in=[])
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        values, reverse = self.decode_cursor(request, len(self.ordering))
+
+        queryset = queryset.order_by(*self._order_by(self.ordering, reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(self.ordering, values, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_values = self.previous_values = None
+        if rows:
+            first = [self._value(rows[0], field) for field in self.ordering]
+            last = [self._value(rows[-1], field) for field in self.ordering]
+            if has_more or (reverse and values is not None):
+                self.next_values = last
+            if values is not None and (not reverse or has_more):
+                self.previous_values = first
+        elif values is not None:
+            # Empty page: still offer the way back
+            if reverse:
+                self.next_values = values
+            else:
+                self.previous_values = values
+        return rows
+
+    # ─── Response ────────────────────────────────────────────────────────────
+
+    def _link(self, values, reverse: bool):
+        if values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, 'page')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values, reverse))
+
+    def get_next_link(self):
+        return self._link(self.next_values, False)
+
+    def get_previous_link(self):
+        return self._link(self.previous_values, True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """Generic list views: switch to KeysetPagination when the client asks for it."""
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if wants_keyset(self.request):
+                self._paginator = KeysetPagination()
+            else:
+                return super().paginator
+        return self._paginator
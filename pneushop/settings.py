@@ -150,6 +150,47 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# ─── Cache ───────────────────────────────────────────────────────────────────
+# Par défaut en mémoire (par process). La version du catalogue est en base
+# (products.http_cache) ; un cache partagé évite seulement à chaque worker
+# gunicorn de sérialiser ses propres copies des réponses, ex. :
+#   CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+#   CACHE_LOCATION=/var/tmp/pneushop_cache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Catalogue public (voir products.http_cache) :
+# max-age=0 → le navigateur revalide à chaque fois (304 si rien n'a changé),
+# donc une modification admin est visible immédiatement.
+CATALOGUE_CACHE_MAX_AGE = config('CATALOGUE_CACHE_MAX_AGE', default=0, cast=int)
+# Durée de vie des réponses sérialisées en cache (une écriture les invalide avant)
+CATALOGUE_CACHE_TIMEOUT = config('CATALOGUE_CACHE_TIMEOUT', default=600, cast=int)
+# Index de recherche / suggestions en mémoire : version partagée relue au plus
+# toutes les N secondes (écritures des autres workers visibles après ce délai)
+CATALOGUE_INDEX_POLL_INTERVAL = config('CATALOGUE_INDEX_POLL_INTERVAL', default=5, cast=int)
+
+# Tableau de bord admin : statistiques servies depuis un instantané recalculé
+# au-delà de cet âge (secondes) — voir products.dashboard / refresh_dashboard_stats
+DASHBOARD_STATS_MAX_AGE = config('DASHBOARD_STATS_MAX_AGE', default=60, cast=int)
+
+# ─── Imports Excel ───────────────────────────────────────────────────────────
+# Les imports sont traités par `python manage.py import_worker`.
+# IMPORT_JOBS_INLINE=True → traitement direct dans la requête (dev sans worker).
+IMPORT_JOBS_INLINE = config('IMPORT_JOBS_INLINE', default=False, cast=bool)
+# Compteurs du job enregistrés toutes les N lignes (les produits sont écrits par lots de 500)
+IMPORT_PROGRESS_EVERY = config('IMPORT_PROGRESS_EVERY', default=200, cast=int)
+# Le worker rafraîchit `updated_at` du job en cours toutes les N secondes :
+# import_worker --stale-minutes ne relance que les jobs dont le worker est mort
+IMPORT_HEARTBEAT_INTERVAL = config('IMPORT_HEARTBEAT_INTERVAL', default=60, cast=int)
+# Images intégrées : envoi en parallèle (N threads) via le client configuré
+# (products.image_pipeline.LocalMediaUploadClient pour stocker en local)
+IMPORT_IMAGE_UPLOAD_WORKERS = config('IMPORT_IMAGE_UPLOAD_WORKERS', default=4, cast=int)
+IMPORT_IMAGE_UPLOAD_CLIENT = config('IMPORT_IMAGE_UPLOAD_CLIENT', default='products.image_pipeline.CloudinaryUploadClient')
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
@@ -172,6 +213,13 @@ EMAIL_HOST_USER = config('POSTMARK_SERVER_TOKEN', default='')
 EMAIL_HOST_PASSWORD = config('POSTMARK_SERVER_TOKEN', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='nepasrepondre@pneushop.tn')
 
+# E-mails de commande : file d'envoi vidée par `python manage.py email_worker`
+# (une connexion SMTP par lot). EMAIL_OUTBOX_INLINE=True → envoi juste après
+# le commit, dans la requête (dev sans worker).
+EMAIL_OUTBOX_INLINE = config('EMAIL_OUTBOX_INLINE', default=False, cast=bool)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+EMAIL_OUTBOX_RETRY_DELAY = config('EMAIL_OUTBOX_RETRY_DELAY', default=60, cast=int)  # secondes, doublé à chaque échec
+
 # ─── App-level email addresses ───────────────────────────────────────────────
 FRONTEND_URL = config('FRONTEND_URL', default='http://localhost:3000')
 
@@ -192,6 +240,17 @@ ACHAT_EMAIL = config('ACHAT_EMAIL', default='service.achat@pneushop.tn')
 
 PASSWORD_RESET_TIMEOUT = 3600  # 1 hour in seconds
 
+# Journal d'activité (accounts.activity) : écrit par lots par un thread de fond
+# (bulk_create + une écriture fichier), vidé à l'arrêt du process.
+# ACTIVITY_LOG_ASYNC=False → écriture directe (tests).
+ACTIVITY_LOG_ASYNC = config('ACTIVITY_LOG_ASYNC', default=True, cast=bool)
+ACTIVITY_LOG_FLUSH_INTERVAL = config('ACTIVITY_LOG_FLUSH_INTERVAL', default=1.0, cast=float)
+ACTIVITY_LOG_BATCH_SIZE = config('ACTIVITY_LOG_BATCH_SIZE', default=500, cast=int)
+# Rotation de logs/activity.log : nouveau fichier chaque jour (UTC) ou au-delà
+# de ACTIVITY_LOG_MAX_BYTES ; les ACTIVITY_LOG_BACKUP_COUNT plus récents sont gardés
+ACTIVITY_LOG_MAX_BYTES = config('ACTIVITY_LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+ACTIVITY_LOG_BACKUP_COUNT = config('ACTIVITY_LOG_BACKUP_COUNT', default=30, cast=int)
+
 # ─── Logging ─────────────────────────────────────────────────────────────────
 # Log file path: /var/www/Pneushop/logs/django.log  (on the VPS)
 # Locally it writes to  <BASE_DIR>/logs/django.log
@@ -10,6 +10,9 @@ class AdminCategorySerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_product_count(self, obj):
+        count = getattr(obj, 'total_product_count', None)
+        if count is not None:
+            return count
         return obj.products.count()
 
 
@@ -1,5 +1,6 @@
 import os
 import subprocess
+from django.db.models import Count
 from django.http import HttpResponse
 from django.utils import timezone
 from rest_framework import generics, status
@@ -11,6 +12,8 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from accounts.permanent_permissions import IsAdmin, IsAdminOrPurchasing, IsAdminOrSales
 from accounts.activity import log_activity
 from .models import Product, Category, StockMovement, SiteSettings
+from .http_cache import bump_catalogue_version
+from .signals import INDEX_FIELDS, index_changed
 from .admin_serializers import (
     AdminProductSerializer, AdminProductCreateUpdateSerializer,
     AdminCategorySerializer, StockMovementSerializer,
@@ -136,14 +139,14 @@ class AdminProductDetailView(generics.RetrieveUpdateDestroyAPIView):
 
 class AdminCategoryListCreateView(generics.ListCreateAPIView):
     """Admin view for listing and creating categories"""
-    queryset = Category.objects.all().order_by('name')
+    queryset = Category.objects.annotate(total_product_count=Count('products')).order_by('name')
     serializer_class = AdminCategorySerializer
     permission_classes = [IsAdminOrPurchasing]
 
 
 class AdminCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
     """Admin view for retrieving, updating, and deleting a specific category"""
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(total_product_count=Count('products'))
     serializer_class = AdminCategorySerializer
     permission_classes = [IsAdminOrPurchasing]
 
@@ -151,105 +154,19 @@ class AdminCategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
 @api_view(['GET'])
 @permission_classes([IsAdminOrSales])
 def admin_dashboard_stats(request):
-    """Get dashboard statistics for admin"""
-    from orders.models import Order, OrderItem
-    from accounts.models import CustomUser
+    """
+    Get dashboard statistics for admin, from the snapshot (products.dashboard)
+    refreshed every DASHBOARD_STATS_MAX_AGE seconds. ?fresh=true recomputes now.
+    """
+    from .dashboard import get_stats
 
     user = request.user
     if getattr(user, 'role', None) not in ('admin', 'sales') and not user.is_superuser:
         return Response({'error': 'Not authorized'}, status=403)
 
-    from django.db.models import Sum, Avg, Min, Max, Count
-
-    total_products = Product.objects.count()
-    active_products = Product.objects.filter(is_active=True).count()
-    featured_products = Product.objects.filter(is_featured=True).count()
-    recent_products = Product.objects.order_by('-created_at').count()
-    total_categories = Category.objects.count()
-    total_customers = CustomUser.objects.filter(role='customer').count()
-    total_orders = Order.objects.count()
-    pending_orders = Order.objects.filter(status='pending').count()
-    completed_orders = Order.objects.filter(status='delivered').count()
-
-    total_revenue = Order.objects.filter(status='delivered').aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
-
-    recent_orders = list(Order.objects.order_by('-created_at')[:5].values(
-        'order_number', 'user__email', 'status', 'created_at', 'total_amount'
-    ))
-
-    # Produits par catégorie
-    products_by_category = list(
-        Category.objects.annotate(product_count=Count('products'))
-        .values('name', 'product_count')
-        .order_by('-product_count')
-    )
-
-    # Stock élevé (top 5)
-    top_stock_products = list(Product.objects.order_by('-stock').values(
-        'id', 'name', 'brand', 'stock', 'price'
-    )[:5])
-
-    # Stock faible - count et détails
-    low_stock_qs = Product.objects.filter(stock__lte=5).order_by('stock')
-    low_stock_count = low_stock_qs.count()
-    low_stock_details = list(low_stock_qs.values('id', 'name', 'brand', 'stock', 'price')[:10])
-
-    # Statistiques des prix
-    price_agg = Product.objects.aggregate(
-        avg_price=Avg('price'),
-        min_price=Min('price'),
-        max_price=Max('price'),
-    )
-    price_stats = {
-        'avg_price': float(price_agg['avg_price'] or 0),
-        'min_price': float(price_agg['min_price'] or 0),
-        'max_price': float(price_agg['max_price'] or 0),
-    }
-
-    # SAV stats + top produits réclamés
-    from orders.models import WarrantyClaim
-    from django.db.models import Q as DQ2
-    sav_stats = {
-        'total':      WarrantyClaim.objects.count(),
-        'pending':    WarrantyClaim.objects.filter(status='pending').count(),
-        'processing': WarrantyClaim.objects.filter(status='processing').count(),
-        'resolved':   WarrantyClaim.objects.filter(status='resolved').count(),
-        'rejected':   WarrantyClaim.objects.filter(status='rejected').count(),
-    }
-    sav_top_products_qs2 = (
-        WarrantyClaim.objects
-        .exclude(order_item_name='')
-        .values('order_item_name')
-        .annotate(reclamations=Count('id'), resolues=Count('id', filter=DQ2(status='resolved')))
-        .order_by('-reclamations')[:5]
-    )
-    sav_top_products = [
-        {'produit': r['order_item_name'], 'reclamations': r['reclamations'], 'resolues': r['resolues']}
-        for r in sav_top_products_qs2
-    ]
-
-    return Response({
-        'total_products': total_products,
-        'active_products': active_products,
-        'featured_products': featured_products,
-        'recent_products': recent_products,
-        'total_categories': total_categories,
-        'total_customers': total_customers,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders,
-        'completed_orders': completed_orders,
-        'total_revenue': float(total_revenue),
-        'recent_orders': recent_orders,
-        'products_by_category': products_by_category,
-        'top_stock_products': top_stock_products,
-        'low_stock_products': low_stock_count,
-        'low_stock_details':  low_stock_details,
-        'price_stats':        price_stats,
-        'sav_stats':          sav_stats,
-        'sav_top_products':   sav_top_products,
-    })
+    fresh = request.query_params.get('fresh', '').lower() == 'true'
+    snapshot = get_stats(max_age=0 if fresh else None)
+    return Response({**snapshot.data, 'computed_at': snapshot.computed_at})
 
 
 @api_view(['POST'])
@@ -277,6 +194,11 @@ def bulk_update_products(request):
         return Response({'error': 'product_ids et updates sont requis'}, status=400)
     try:
         count = Product.objects.filter(id__in=product_ids).update(**updates)
+        # update() ne déclenche pas les signaux → index de recherche / suggestions
+        # et cache catalogue mis à jour ici
+        if set(updates) & set(INDEX_FIELDS):
+            index_changed(product_ids)
+        bump_catalogue_version()
         return Response({'message': f'{count} produits mis à jour avec succès'})
     except Exception as e:
         return Response({'error': f'Erreur lors de la mise à jour: {str(e)}'}, status=400)
@@ -773,6 +695,7 @@ def reset_all_products(request):
     """POST /api/admin/products/reset-all/ — Reset stock to 0 for all products."""
     from .models import Product
     count = Product.objects.all().update(stock=0)
+    bump_catalogue_version()
     try:
         log_activity(
             request.user, 'adjust_stock',
@@ -0,0 +1,162 @@
+"""
+In-memory prefix index behind /api/products/search-suggestions/.
+
+Every active product is registered under several folded keys — full name,
+each word of the name, brand, reference and compact size ("2254517") — in
+one sorted list. A keystroke is a bisect plus a short forward walk, so
+suggestions never hit the database once the index is built.
+
+The index is per process: built on the first suggestion request and kept
+current by products.signals for this process's own writes. Writes made by
+other processes (gunicorn workers, import worker) are caught through the
+shared INDEX version (products.versions), which only moves when an indexed
+field changes — not on stock or price saves. It is polled at most every
+CATALOGUE_INDEX_POLL_INTERVAL seconds; when another process moved it, the
+next suggestion rebuilds the index.
+"""
+import bisect
+import threading
+
+from . import versions
+from .search import compact_size, fold
+
+# Lower = shown first when several keys match the same prefix
+PRIORITY_NAME = 0
+PRIORITY_BRAND = 1
+PRIORITY_SIZE = 2
+PRIORITY_REFERENCE = 3
+PRIORITY_WORD = 4
+
+# Fields read to build a product's keys / suggestion payload
+INDEXED_FIELDS = ('name', 'brand', 'size', 'reference', 'slug', 'is_active')
+
+# Max keys examined per lookup: keeps one-letter queries bounded
+MAX_SCAN = 500
+
+
+def _keys_for(values: dict) -> set[tuple[str, int]]:
+    name = fold(values.get('name')).strip()
+    keys = set()
+    if name:
+        keys.add((name, PRIORITY_NAME))
+        for word in name.split()[1:]:
+            keys.add((word, PRIORITY_WORD))
+    brand = fold(values.get('brand')).strip()
+    if brand:
+        keys.add((brand, PRIORITY_BRAND))
+    reference = fold(values.get('reference')).strip()
+    if reference:
+        keys.add((reference, PRIORITY_REFERENCE))
+    size = compact_size(values.get('size'))
+    if size:
+        keys.add((size, PRIORITY_SIZE))
+    return keys
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._built = False
+        self._version = None  # version INDEX que reflète l'index
+        self._watch = versions.VersionWatch(versions.INDEX)
+        self._keys: list[tuple[str, int, int]] = []  # (key, priority, pk), sorted
+        self._entries: dict[int, dict] = {}           # pk -> suggestion payload
+        self._product_keys: dict[int, set[tuple[str, int]]] = {}
+
+    def _ensure_built(self):
+        from .models import Product
+
+        if self._built and self._version >= self._watch.current():
+            return
+        with self._lock:
+            # Lue avant les produits : une écriture pendant la construction relance la suivante
+            version = self._watch.read()
+            if self._built and self._version >= version:
+                return
+            keys = []
+            self._entries = {}
+            self._product_keys = {}
+            rows = Product.objects.filter(is_active=True).values('pk', *INDEXED_FIELDS)
+            for row in rows.iterator(chunk_size=2000):
+                product_keys = _keys_for(row)
+                self._entries[row['pk']] = self._payload(row)
+                self._product_keys[row['pk']] = product_keys
+                keys.extend((key, priority, row['pk']) for key, priority in product_keys)
+            keys.sort()
+            self._keys = keys
+            self._version = version
+            self._built = True
+
+    @staticmethod
+    def _payload(values: dict) -> dict:
+        return {
+            'id': values['pk'],
+            'brand': values.get('brand') or '',
+            'name': values.get('name') or '',
+            'slug': values.get('slug'),
+            'size': values.get('size') or '',
+            'reference': values.get('reference') or '',
+        }
+
+    def _remove(self, pk):
+        self._entries.pop(pk, None)
+        for key, priority in self._product_keys.pop(pk, ()):
+            item = (key, priority, pk)
+            i = bisect.bisect_left(self._keys, item)
+            if i < len(self._keys) and self._keys[i] == item:
+                del self._keys[i]
+
+    def update_products(self, products):
+        """Insert / refresh / drop (inactive) the given products. No-op before the first build."""
+        if not self._built:
+            return
+        with self._lock:
+            for product in products:
+                self._remove(product.pk)
+                if not product.is_active:
+                    continue
+                values = {field: getattr(product, field) for field in INDEXED_FIELDS}
+                values['pk'] = product.pk
+                product_keys = _keys_for(values)
+                self._entries[product.pk] = self._payload(values)
+                self._product_keys[product.pk] = product_keys
+                for key, priority in product_keys:
+                    bisect.insort(self._keys, (key, priority, product.pk))
+
+    def advance(self, old: int, new: int):
+        """This process's change moved the INDEX version old → new: already applied here."""
+        with self._lock:
+            if self._built and self._version == old:
+                self._version = new
+
+    def remove_products(self, pks):
+        if not self._built:
+            return
+        with self._lock:
+            for pk in pks:
+                self._remove(pk)
+
+    def suggest(self, query: str, limit: int = 10) -> list[dict]:
+        self._ensure_built()
+        prefixes = {fold(query).strip()}
+        # "225/45 R17", "225 45 17"... → also try the compact size form
+        digits = compact_size(query)
+        if digits and len(digits) >= 3:
+            prefixes.add(digits)
+        prefixes.discard('')
+
+        best: dict[int, tuple[int, str]] = {}
+        with self._lock:
+            for prefix in prefixes:
+                i = bisect.bisect_left(self._keys, (prefix,))
+                end = min(len(self._keys), i + MAX_SCAN)
+                while i < end and self._keys[i][0].startswith(prefix):
+                    key, priority, pk = self._keys[i]
+                    if pk not in best or (priority, key) < best[pk]:
+                        best[pk] = (priority, key)
+                    i += 1
+            ranked = sorted(best, key=lambda pk: (best[pk], self._entries[pk]['name']))
+            return [self._entries[pk] for pk in ranked[:limit]]
+
+
+index = AutocompleteIndex()
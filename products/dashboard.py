@@ -0,0 +1,146 @@
+"""
+Admin dashboard statistics (products.admin_views.admin_dashboard_stats).
+
+compute_stats() gathers all the figures in a few queries instead of
+one COUNT per figure:
+  - products: totals, active, featured, low stock and price min / avg / max
+    in ONE query of conditional aggregates (COUNT(*) FILTER (WHERE ...));
+  - orders: total, pending, delivered and delivered revenue in one query;
+  - SAV: the five status counts in one query;
+  - categories with their product count (also gives the category total);
+  - customers, plus the short lists (latest orders, top / low stock, top
+    claimed products).
+
+The result is stored in DashboardSnapshot. get_stats() serves it as long as
+it is younger than DASHBOARD_STATS_MAX_AGE seconds, so opening the admin
+home page is one indexed read whatever the size of the tables. A stale
+snapshot is recomputed by the request that finds it, under a row lock
+(SELECT ... FOR UPDATE on the snapshot, whose row the migration creates):
+concurrent requests wait for that one computation and serve its result
+instead of all recomputing. `python manage.py refresh_dashboard_stats`
+(cron) keeps it fresh ahead of time.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+from django.utils import timezone
+
+from .models import Category, DashboardSnapshot, Product
+
+LOW_STOCK_THRESHOLD = 5
+SAV_STATUSES = ('pending', 'processing', 'resolved', 'rejected')
+
+
+def compute_stats() -> dict:
+    from accounts.models import CustomUser
+    from orders.models import Order, WarrantyClaim
+
+    products = Product.objects.aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_active=True)),
+        featured=Count('id', filter=Q(is_featured=True)),
+        low_stock=Count('id', filter=Q(stock__lte=LOW_STOCK_THRESHOLD)),
+        avg_price=Avg('price'),
+        min_price=Min('price'),
+        max_price=Max('price'),
+    )
+    orders = Order.objects.aggregate(
+        total=Count('id'),
+        pending=Count('id', filter=Q(status='pending')),
+        delivered=Count('id', filter=Q(status='delivered')),
+        revenue=Sum('total_amount', filter=Q(status='delivered')),
+    )
+    sav = WarrantyClaim.objects.aggregate(
+        total=Count('id'),
+        **{status: Count('id', filter=Q(status=status)) for status in SAV_STATUSES},
+    )
+
+    # Produits par catégorie (toutes les catégories : donne aussi leur nombre)
+    products_by_category = list(
+        Category.objects.annotate(product_count=Count('products'))
+        .values('name', 'product_count')
+        .order_by('-product_count')
+    )
+
+    sav_top_products = [
+        {'produit': r['order_item_name'], 'reclamations': r['reclamations'], 'resolues': r['resolues']}
+        for r in (
+            WarrantyClaim.objects
+            .exclude(order_item_name='')
+            .values('order_item_name')
+            .annotate(reclamations=Count('id'), resolues=Count('id', filter=Q(status='resolved')))
+            .order_by('-reclamations')[:5]
+        )
+    ]
+
+    return {
+        'total_products': products['total'],
+        'active_products': products['active'],
+        'featured_products': products['featured'],
+        'recent_products': products['total'],
+        'total_categories': len(products_by_category),
+        'total_customers': CustomUser.objects.filter(role='customer').count(),
+        'total_orders': orders['total'],
+        'pending_orders': orders['pending'],
+        'completed_orders': orders['delivered'],
+        'total_revenue': float(orders['revenue'] or 0),
+        'recent_orders': list(Order.objects.order_by('-created_at')[:5].values(
+            'order_number', 'user__email', 'status', 'created_at', 'total_amount'
+        )),
+        'products_by_category': products_by_category,
+        'top_stock_products': list(Product.objects.order_by('-stock').values(
+            'id', 'name', 'brand', 'stock', 'price'
+        )[:5]),
+        'low_stock_products': products['low_stock'],
+        'low_stock_details': list(
+            Product.objects.filter(stock__lte=LOW_STOCK_THRESHOLD).order_by('stock')
+            .values('id', 'name', 'brand', 'stock', 'price')[:10]
+        ),
+        'price_stats': {
+            'avg_price': float(products['avg_price'] or 0),
+            'min_price': float(products['min_price'] or 0),
+            'max_price': float(products['max_price'] or 0),
+        },
+        'sav_stats': {'total': sav['total'], **{status: sav[status] for status in SAV_STATUSES}},
+        'sav_top_products': sav_top_products,
+    }
+
+
+def _is_fresh(snapshot: DashboardSnapshot, max_age: int) -> bool:
+    return snapshot.computed_at >= timezone.now() - timedelta(seconds=max_age)
+
+
+def refresh(key: str = 'admin', max_age: int | None = None) -> DashboardSnapshot:
+    """
+    Recompute the snapshot while holding its row lock. With `max_age`, a
+    snapshot refreshed by another request while this one waited for the lock
+    is returned as is.
+    """
+    with transaction.atomic():
+        snapshot = DashboardSnapshot.objects.select_for_update().filter(key=key).first()
+        if snapshot is None:
+            # Ligne absente (base créée sans les migrations) : get_or_create gère la course
+            DashboardSnapshot.objects.get_or_create(key=key, defaults={'computed_at': timezone.now()})
+            snapshot = DashboardSnapshot.objects.select_for_update().get(key=key)
+        elif max_age is not None and _is_fresh(snapshot, max_age):
+            return snapshot
+
+        start = time.perf_counter()
+        snapshot.data = compute_stats()
+        snapshot.computed_at = timezone.now()
+        snapshot.duration_ms = (time.perf_counter() - start) * 1000
+        snapshot.save(update_fields=['data', 'computed_at', 'duration_ms'])
+    return snapshot
+
+
+def get_stats(max_age: int | None = None) -> DashboardSnapshot:
+    """The snapshot, recomputed first if older than `max_age` seconds (DASHBOARD_STATS_MAX_AGE)."""
+    if max_age is None:
+        max_age = getattr(settings, 'DASHBOARD_STATS_MAX_AGE', 60)
+    snapshot = DashboardSnapshot.objects.filter(key='admin').first()
+    if snapshot is None or not _is_fresh(snapshot, max_age):
+        snapshot = refresh(max_age=max_age)
+    return snapshot
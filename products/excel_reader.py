@@ -0,0 +1,184 @@
+"""
+Streaming reader for the supplier Excel files (see import_views.parse_excel_sheets).
+
+    for sheet in iter_sheets(path_or_bytes, filename):
+        sheet.estimated_rows           # from the sheet dimension, for progress
+                                       # (.xls: 0, on_load(nrows) once loaded)
+        for row_idx, values, images in sheet.rows():
+            ...
+
+.xlsx are opened with openpyxl `read_only=True`: rows are parsed from the
+sheet XML as they are iterated, never materialised as a whole workbook.
+Embedded pictures are located once per sheet from the drawing XML
+(row → zip member names) and only read when a row asks for them, so a
+50 MB file with hundreds of photos stays at a bounded memory footprint.
+.xls go through xlrd with `on_demand=True`: one sheet loaded at a time.
+"""
+import io
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+NS = {
+    'xdr': 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+R_EMBED = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed'
+
+
+def open_source(source):
+    """Path or bytes → something openpyxl / zipfile can read (a fresh stream each call)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+class LazyImages:
+    """Sequence of embedded image bytes for one row, read from the archive on access."""
+
+    def __init__(self, archive: zipfile.ZipFile, members: list[str]):
+        self._archive = archive
+        self._members = members
+
+    @property
+    def members(self) -> list[str]:
+        return self._members
+
+    def __len__(self):
+        return len(self._members)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._archive.read(member) for member in self._members[index]]
+        return self._archive.read(self._members[index])
+
+    def __iter__(self):
+        for member in self._members:
+            yield self._archive.read(member)
+
+
+def _rels(archive: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str]]:
+    """rId → (type, absolute target) for an OOXML part."""
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, '_rels', f'{name}.rels')
+    try:
+        root = ElementTree.fromstring(archive.read(rels_path))
+    except KeyError:
+        return {}
+    rels = {}
+    for rel in root.findall('rel:Relationship', NS):
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            target = target.lstrip('/')
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get('Id')] = (rel.get('Type', ''), target)
+    return rels
+
+
+def sheet_image_index(archive: zipfile.ZipFile, sheet_path: str) -> dict[int, list[str]]:
+    """0-based sheet row → zip members of the pictures anchored on that row (drawing order)."""
+    index: dict[int, list[str]] = {}
+    for rel_type, drawing_path in _rels(archive, sheet_path.lstrip('/')).values():
+        if not rel_type.endswith('/drawing'):
+            continue
+        try:
+            drawing = ElementTree.fromstring(archive.read(drawing_path))
+        except KeyError:
+            continue
+        drawing_rels = _rels(archive, drawing_path)
+        for anchor in list(drawing):
+            row = anchor.find('xdr:from/xdr:row', NS)
+            if row is None:
+                continue  # absoluteAnchor: not tied to a row
+            for blip in anchor.iter(f'{{{NS["a"]}}}blip'):
+                target = drawing_rels.get(blip.get(R_EMBED))
+                if target:
+                    index.setdefault(int(row.text), []).append(target[1])
+    return index
+
+
+def embedded_image_members(source, filename: str = '') -> list[str]:
+    """Every zip member used as an embedded picture by any worksheet (.xlsx only)."""
+    if filename.lower().endswith('.xls'):
+        return []
+    members: dict[str, None] = {}
+    with zipfile.ZipFile(open_source(source)) as archive:
+        for rel_type, sheet_path in _rels(archive, 'xl/workbook.xml').values():
+            if rel_type.endswith('/worksheet'):
+                for row_members in sheet_image_index(archive, sheet_path).values():
+                    members.update(dict.fromkeys(row_members))
+    return list(members)
+
+
+class XlsxSheet:
+    def __init__(self, worksheet, archive: zipfile.ZipFile):
+        self.title = worksheet.title
+        self._worksheet = worksheet
+        self._archive = archive
+        self.estimated_rows = worksheet.max_row or 0
+        # Some generators write a wrong <dimension>: read every cell instead
+        worksheet.reset_dimensions()
+
+    def rows(self):
+        images = sheet_image_index(self._archive, self._worksheet._worksheet_path)
+        for row_idx, values in enumerate(self._worksheet.iter_rows(values_only=True)):
+            members = images.get(row_idx)
+            yield row_idx, values, LazyImages(self._archive, members) if members else None
+
+
+class XlsSheet:
+    def __init__(self, book, index: int, on_load=None):
+        self._book = book
+        self._index = index
+        self._on_load = on_load
+        self.title = book.sheet_names()[index]
+        self.estimated_rows = 0  # unknown until the sheet is loaded
+
+    def rows(self):
+        sheet = self._book.sheet_by_index(self._index)
+        self.estimated_rows = sheet.nrows
+        if self._on_load:
+            self._on_load(sheet.nrows)
+        try:
+            for row_idx in range(sheet.nrows):
+                yield row_idx, tuple(sheet.row_values(row_idx)), None
+        finally:
+            self._book.unload_sheet(self._index)
+
+
+def iter_sheets(source, filename: str = '', on_load=None):
+    """
+    Yield one sheet reader at a time for a file path or the file content (bytes).
+    `on_load(nrows)` is called when an .xls sheet is loaded, the first time its
+    row count is known (an .xlsx announces it in estimated_rows).
+    """
+    ext = filename.lower().rsplit('.', 1)[-1] if '.' in filename else 'xlsx'
+
+    if ext == 'xls':
+        import xlrd
+        if isinstance(source, (bytes, bytearray)):
+            book = xlrd.open_workbook(file_contents=bytes(source), on_demand=True)
+        else:
+            book = xlrd.open_workbook(source, on_demand=True)
+        try:
+            for index in range(book.nsheets):
+                yield XlsSheet(book, index, on_load)
+        finally:
+            book.release_resources()
+        return
+
+    import openpyxl
+    workbook = openpyxl.load_workbook(open_source(source), read_only=True, data_only=True)
+    try:
+        with zipfile.ZipFile(open_source(source)) as archive:
+            for worksheet in workbook.worksheets:
+                yield XlsxSheet(worksheet, archive)
+    finally:
+        workbook.close()
+
+
+def estimate_rows(source, filename: str = '') -> int:
+    """Row count announced by the sheet dimensions (cheap, for progress display)."""
+    return sum(sheet.estimated_rows for sheet in iter_sheets(source, filename))
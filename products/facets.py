@@ -0,0 +1,108 @@
+"""
+Catalogue facets for /api/products/filters/ (brands, seasons, categories,
+tire dimensions, price range — with product counts).
+
+Everything comes from one GROUP BY over the active products. The result is
+cached under the catalogue version (products.http_cache): any catalogue
+write, in any process, moves the version, so a cached dict is never served
+for a newer catalogue and nothing has to be invalidated.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Min
+
+FACETS_CACHE_KEY = 'products:facets:{}'
+# Une version remplacée n'est plus lue : le délai ne sert qu'à libérer la place
+FACETS_CACHE_TIMEOUT = 3600
+
+
+def _counted(counter: Counter, key=None) -> list[dict]:
+    return [
+        {'value': value, 'count': count}
+        for value, count in sorted(counter.items(), key=key or (lambda item: item[0]))
+    ]
+
+
+def compute_facets() -> dict:
+    from .models import Product
+
+    rows = (
+        Product.objects.filter(is_active=True)
+        .values(
+            'brand', 'season', 'category_id', 'category__name', 'category__slug',
+            'tire_width', 'tire_aspect', 'tire_rim',
+        )
+        .annotate(count=Count('id'), min_price=Min('price'), max_price=Max('price'))
+        .order_by()
+    )
+
+    brands, seasons = Counter(), Counter()
+    widths, heights, diameters = Counter(), Counter(), Counter()
+    categories: dict[int, dict] = {}
+    min_price = max_price = None
+
+    for row in rows:
+        n = row['count']
+        if row['brand']:
+            brands[row['brand']] += n
+        if row['season']:
+            seasons[row['season']] += n
+        if row['category_id'] is not None:
+            category = categories.setdefault(row['category_id'], {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+                'count': 0,
+            })
+            category['count'] += n
+        if row['tire_width'] is not None:
+            widths[row['tire_width']] += n
+        if row['tire_aspect'] is not None:
+            heights[row['tire_aspect']] += n
+        if row['tire_rim'] is not None:
+            diameters[row['tire_rim']] += n
+        if min_price is None or row['min_price'] < min_price:
+            min_price = row['min_price']
+        if max_price is None or row['max_price'] > max_price:
+            max_price = row['max_price']
+
+    return {
+        'brands': sorted(brands),
+        'brand_counts': _counted(brands),
+        'seasons': [{'value': s, 'label': s, 'count': n} for s, n in sorted(seasons.items())],
+        'categories': sorted(categories.values(), key=lambda c: c['name']),
+        'sizes': {
+            'width': _counted(widths),
+            'height': _counted(heights),
+            'diameter': _counted(diameters),
+        },
+        'price_range': {
+            'min': float(min_price) if min_price is not None else 0,
+            'max': float(max_price) if max_price is not None else 0,
+        },
+    }
+
+
+def get_facets() -> dict:
+    from .http_cache import get_catalogue_version
+
+    key = FACETS_CACHE_KEY.format(get_catalogue_version())
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets()
+        cache.set(key, facets, FACETS_CACHE_TIMEOUT)
+    return facets
+
+
+def category_counts() -> dict[int, int]:
+    """
+    {category_id: active product count}, in one GROUP BY — the counts of
+    CategoryListView.
+    """
+    from .models import Product
+
+    return dict(
+        Product.objects.filter(is_active=True, category__isnull=False)
+        .values_list('category_id').annotate(count=Count('id')).order_by()
+    )
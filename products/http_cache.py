@@ -0,0 +1,106 @@
+"""
+HTTP caching for the public catalogue endpoints (list, detail, featured,
+promotions, categories, filters).
+
+A single catalogue version stamp — bumped by products.signals on every
+Product / Category / SiteSettings write — drives everything:
+  - ETag / Last-Modified are derived from it, so conditional requests from
+    browsers, the Next.js frontend or a reverse proxy get 304 Not Modified;
+  - serialized response data is cached under (version, URL, format), so a
+    write makes every cached page stale at once without tracking keys.
+
+The stamp is the CATALOGUE version of products.versions (a database row),
+read with one indexed SELECT per request: every gunicorn worker
+sees a write immediately, whatever the cache backend. The response bodies
+stay in the Django cache. With the default LocMemCache each worker fills
+its own copy, but a body is only ever served for the current version, so it
+is never stale.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import versions
+
+
+def get_catalogue_version() -> int:
+    return versions.get_version(versions.CATALOGUE)
+
+
+def bump_catalogue_version():
+    versions.bump_version(versions.CATALOGUE)
+
+
+def _etag(version: int, request) -> str:
+    fmt = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+    digest = hashlib.md5(f'{version}:{fmt}:{request.get_full_path()}'.encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def _not_modified(request, etag: str, last_modified: int) -> bool:
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        return etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    # HTTP dates have 1 s resolution: two writes within the same second share a
+    # Last-Modified, so only a strictly newer client copy is trusted (ETag is exact)
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified < if_modified_since
+
+
+def _set_cache_headers(response, etag: str, last_modified: int):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = f'public, max-age={settings.CATALOGUE_CACHE_MAX_AGE}, must-revalidate'
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def cached_catalogue_response(request, build_response):
+    """
+    Serve `build_response()` through the catalogue cache: 304 if the client
+    copy is current, cached data if another client already asked for it,
+    otherwise build, store and return it. Only 200 responses are stored.
+    """
+    version = get_catalogue_version()
+    etag = _etag(version, request)
+    last_modified = version // 1000 or 1
+
+    if _not_modified(request, etag, last_modified):
+        return _set_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
+
+    fmt = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+    key = 'catalogue:response:{}:{}'.format(
+        version, hashlib.md5(f'{fmt}:{request.build_absolute_uri()}'.encode()).hexdigest(),
+    )
+    data = cache.get(key)
+    if data is not None:
+        response = Response(data)
+    else:
+        response = build_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        cache.set(key, response.data, settings.CATALOGUE_CACHE_TIMEOUT)
+    return _set_cache_headers(response, etag, last_modified)
+
+
+class CatalogueCacheMixin:
+    """For public read-only generic views: GET goes through cached_catalogue_response."""
+
+    def get(self, request, *args, **kwargs):
+        return cached_catalogue_response(request, lambda: super(CatalogueCacheMixin, self).get(request, *args, **kwargs))
+
+
+def catalogue_cache(view_func):
+    """Same as CatalogueCacheMixin for @api_view functions (place under @permission_classes)."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view_func(request, *args, **kwargs)
+        return cached_catalogue_response(request, lambda: view_func(request, *args, **kwargs))
+    return wrapper
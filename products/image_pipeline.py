@@ -0,0 +1,150 @@
+"""
+Embedded-image stage of the Excel import.
+
+Before the rows are processed, ImagePipeline.prepare():
+  1. hashes (MD5) every picture embedded in the workbook, once per archive member;
+  2. looks the hashes up in the persistent ImportImage table (hash → URL),
+     so a photo already uploaded by any previous import is reused as-is;
+  3. uploads the misses in parallel through a bounded thread pool and
+     records them in ImportImage.
+
+The row loop then only maps a row's pictures to URLs (`url()`), without
+any network call.
+
+In dry-run (`upload=False`) nothing is sent: a picture not known yet maps to
+a `pending-image:<hash>` placeholder, turned into its URL by resolve() once a
+later prepare() with uploads has run on the same file.
+
+The upload client is pluggable (settings.IMPORT_IMAGE_UPLOAD_CLIENT, or
+the `client` argument): CloudinaryUploadClient in production,
+LocalMediaUploadClient to keep files under MEDIA_ROOT (dev, tests).
+"""
+import hashlib
+import io
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from . import excel_reader
+from .models import ImportImage
+
+PENDING_IMAGE_PREFIX = 'pending-image:'
+
+
+class CloudinaryUploadClient:
+    folder = 'pneushop/products'
+
+    def upload(self, data: bytes, image_hash: str, ext: str = '') -> str:
+        # Cloudinary détecte le format lui-même : l'extension est inutile
+        import cloudinary.uploader
+        result = cloudinary.uploader.upload(
+            io.BytesIO(data),
+            folder=self.folder,
+            public_id=f'tire_{image_hash}',
+            overwrite=False,
+            resource_type='image',
+        )
+        return result.get('secure_url', '')
+
+
+class LocalMediaUploadClient:
+    """Writes the pictures under MEDIA_ROOT/import_images/ (no external service)."""
+    subdir = 'import_images'
+
+    def upload(self, data: bytes, image_hash: str, ext: str = '') -> str:
+        # Extension conservée : le serveur web en déduit le Content-Type
+        name = f'tire_{image_hash}{ext}'
+        folder = os.path.join(settings.MEDIA_ROOT, self.subdir)
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+        return f'{settings.MEDIA_URL}{self.subdir}/{name}'
+
+
+def get_upload_client():
+    path = getattr(settings, 'IMPORT_IMAGE_UPLOAD_CLIENT', 'products.image_pipeline.CloudinaryUploadClient')
+    return import_string(path)()
+
+
+class ImagePipeline:
+    def __init__(self, client=None, max_workers: int | None = None, upload: bool = True):
+        self.client = client or get_upload_client()
+        self.max_workers = max_workers or getattr(settings, 'IMPORT_IMAGE_UPLOAD_WORKERS', 4)
+        self.upload = upload
+        self._member_hash: dict[str, str] = {}
+        self._urls: dict[str, str] = {}
+        self.uploaded = 0
+        self.reused = 0
+        self.failed = 0
+        self.pending = 0
+
+    def prepare(self, source, filename: str = ''):
+        members = excel_reader.embedded_image_members(source, filename)
+        if not members:
+            return
+        with zipfile.ZipFile(excel_reader.open_source(source)) as archive:
+            member_for_hash: dict[str, str] = {}
+            for member in members:
+                image_hash = hashlib.md5(archive.read(member)).hexdigest()
+                self._member_hash[member] = image_hash
+                member_for_hash.setdefault(image_hash, member)
+
+            self._urls = dict(
+                ImportImage.objects.filter(hash__in=list(member_for_hash)).values_list('hash', 'url')
+            )
+            self.reused = len(self._urls)
+            missing = {h: m for h, m in member_for_hash.items() if h not in self._urls}
+            if missing and self.upload:
+                self._upload(archive, missing)
+            else:
+                self.pending = len(missing)
+
+    def _upload(self, archive: zipfile.ZipFile, missing: dict[str, str]):
+        def upload_one(image_hash, member):
+            ext = os.path.splitext(member)[1].lower()  # xl/media/image1.png → .png
+            return self.client.upload(archive.read(member), image_hash, ext)
+
+        new_rows = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(upload_one, h, m): h for h, m in missing.items()}
+            for future in as_completed(futures):
+                image_hash = futures[future]
+                try:
+                    url = future.result()
+                except Exception:
+                    url = ''
+                if url:
+                    self._urls[image_hash] = url
+                    new_rows.append(ImportImage(hash=image_hash, url=url))
+                    self.uploaded += 1
+                else:
+                    self.failed += 1
+        ImportImage.objects.bulk_create(new_rows, ignore_conflicts=True)
+
+    def url(self, images, index: int) -> str:
+        """URL of the `index`-th picture of a row (excel_reader.LazyImages), '' if none."""
+        if not images or index >= len(images):
+            return ''
+        image_hash = self._member_hash.get(images.members[index])
+        if image_hash in self._urls:
+            return self._urls[image_hash]
+        return f'{PENDING_IMAGE_PREFIX}{image_hash}' if image_hash and not self.upload else ''
+
+    def uploaded_all(self, images) -> bool:
+        """False when a picture of the row has no URL because its upload failed."""
+        if not images or not self.upload:
+            return True
+        return all(self._member_hash.get(member) in self._urls for member in images.members)
+
+    def hashes(self, images) -> list[str]:
+        """MD5 of each picture of a row (import fingerprints)."""
+        return [self._member_hash.get(member, '') for member in images.members] if images else []
+
+    def resolve(self, url: str) -> str:
+        """Placeholder from a dry-run → URL of the uploaded picture ('' if it failed)."""
+        if url.startswith(PENDING_IMAGE_PREFIX):
+            return self._urls.get(url[len(PENDING_IMAGE_PREFIX):], '')
+        return url
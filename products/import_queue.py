@@ -0,0 +1,123 @@
+"""
+Database-backed queue for ImportJob processing.
+
+The import endpoints only store the file and mark the job `queued`; the
+`import_worker` management command claims queued jobs one at a time and
+runs them outside the HTTP request:
+
+    claim_next_job()  SELECT ... FOR UPDATE SKIP LOCKED on the oldest queued
+                      job, flipped to `running` in the same transaction — several
+                      workers never pick the same job.
+    process_job(job)  runs import_views._run_import_job, which saves its counts
+                      (created / errors) every IMPORT_PROGRESS_EVERY rows for
+                      the import_status polling endpoint — or, for a job queued
+                      by apply_import_changeset (apply_requested), writes its
+                      previewed changeset (import_views._apply_import_job).
+                      While it runs, a heartbeat thread touches the job's
+                      `updated_at` every IMPORT_HEARTBEAT_INTERVAL seconds —
+                      image uploads or a large apply can go minutes without
+                      a progress save.
+    requeue_stale_jobs(minutes)
+                      puts back in the queue the `running` jobs whose
+                      heartbeat stopped, i.e. whose worker died.
+
+With IMPORT_JOBS_INLINE = True (dev without a worker) enqueue() runs the job
+right away in the request, like before.
+"""
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import ImportJob
+
+
+def enqueue(job: ImportJob):
+    job.status = 'queued'
+    job.message = 'En attente de traitement…'
+    job.started_at = None
+    job.finished_at = None
+    job.save(update_fields=['status', 'message', 'started_at', 'finished_at', 'updated_at'])
+    if getattr(settings, 'IMPORT_JOBS_INLINE', False):
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.save(update_fields=['status', 'started_at', 'updated_at'])
+        process_job(job)
+
+
+def claim_next_job() -> ImportJob | None:
+    with transaction.atomic():
+        job = (
+            ImportJob.objects.select_for_update(skip_locked=True)
+            .filter(status='queued')
+            .order_by('created_at')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = 'running'
+        job.started_at = timezone.now()
+        job.message = 'Import en cours…'
+        job.save(update_fields=['status', 'started_at', 'message', 'updated_at'])
+    return job
+
+
+class Heartbeat:
+    """Context manager: touches the running job's updated_at from a thread until exit."""
+
+    def __init__(self, job: ImportJob, interval: float | None = None):
+        self.job_id = job.pk
+        self.interval = interval or getattr(settings, 'IMPORT_HEARTBEAT_INTERVAL', 60)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f'import-heartbeat-{self.job_id}', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    ImportJob.objects.filter(pk=self.job_id, status='running').update(updated_at=timezone.now())
+                except Exception:
+                    pass  # base occupée (SQLite) : battement suivant
+        finally:
+            connection.close()  # connexion propre à ce thread
+
+
+def requeue_stale_jobs(minutes: int) -> int:
+    """Jobs left `running` by a dead worker (no heartbeat for `minutes`) go back to the queue."""
+    limit = timezone.now() - timedelta(minutes=minutes)
+    return ImportJob.objects.filter(status='running', updated_at__lt=limit).update(
+        status='queued', message='Relancé après interruption du worker.', updated_at=timezone.now(),
+    )
+
+
+def process_job(job: ImportJob):
+    with Heartbeat(job):
+        _process_job(job)
+
+
+def _process_job(job: ImportJob):
+    import os
+    from .import_views import _apply_import_job, _run_import_job
+
+    if job.apply_requested:
+        _apply_import_job(job)
+        return
+    if not os.path.exists(job.file_path):
+        job.status = 'failed'
+        job.message = f'Fichier stocké introuvable : {job.file_path}'
+        job.finished_at = timezone.now()
+        job.save()
+        return
+    # The parser streams the file from disk — never read whole into memory
+    _run_import_job(job, job.file_path, job.original_filename)
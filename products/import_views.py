@@ -1,18 +1,20 @@
-import re
-import io
 import os
+import math
 import uuid
 import hashlib
-import openpyxl
-import urllib.request
-import urllib.error
+from itertools import islice
+from django.conf import settings
 from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Product, Category, ImportJob
+from . import excel_reader, import_queue
+from .brand_extractor import BrandSizeExtractor
+from .image_pipeline import PENDING_IMAGE_PREFIX, ImagePipeline
+from .importer import ProductImporter, apply_changeset, row_fingerprint
+from .models import ImportJob
 
 
 # Column name aliases (case-insensitive, stripped)
@@ -33,8 +35,15 @@ BRAND_ALIASES = {'marque', 'brand', 'fabricant'}
 SIZE_ALIASES = {'taille', 'dimension', 'size', 'dimension pneu', 'dimensions'}
 IMAGE_ALIASES = {'image', 'photo', 'img', 'image url', 'photo url', 'lien image', 'url image', 'image principale'}
 
-# Cache: md5_hash -> cloudinary URL (avoids re-uploading the same image)
-_image_cache: dict[str, str] = {}
+# Progression enregistrée toutes les N lignes (polling import_status)
+IMPORT_PROGRESS_EVERY = getattr(settings, 'IMPORT_PROGRESS_EVERY', 200)
+
+# Fichiers téléversés copiés sur disque par blocs de N octets
+IMPORT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Lignes mappées par paquets de N (prix / stock analysés colonne par colonne)
+IMPORT_MAP_CHUNK_SIZE = 1000
+
 
 
 def normalize_col(col: str) -> str:
@@ -91,43 +100,12 @@ BRAND_CANONICAL: dict[str, str] = {
 KNOWN_BRANDS = set(BRAND_CANONICAL.keys())
 
 
-def extract_brand_size_from_name(name: str):
-    """Extract brand and size (e.g. 225/45R17) from product name."""
-    brand = ''
-    size = ''
-    size_match = re.search(r'\d{3}/\d{2}\s*[Rr]\s*\d{2,3}', name)
-    if size_match:
-        size = size_match.group(0).replace(' ', '')
-
-    parts = name.strip().split()
-
-    # Pass 1: try 2-word combinations to catch multi-word brands (e.g. "Good Year", "BF Goodrich", "Central Tire")
-    for i in range(len(parts) - 1):
-        two_word = f"{parts[i].rstrip('.,')} {parts[i + 1].rstrip('.,')}"
-        two_lower = two_word.lower()
-        if two_lower in KNOWN_BRANDS:
-            brand = BRAND_CANONICAL.get(two_lower, two_word)
-            break
-
-    # Pass 2: single-word match
-    if not brand:
-        for part in parts:
-            p_lower = part.lower().rstrip('.,')
-            if p_lower in SKIP_WORDS:
-                continue
-            # Skip size-like parts (digit-starts or short alpha+digits like R17)
-            if not part:
-                continue
-            if part[0].isdigit() or (len(part) <= 4 and part[0].isalpha() and any(c.isdigit() for c in part)):
-                continue
-            if p_lower in KNOWN_BRANDS:
-                brand = part.rstrip('.,')
-                break
-            if part[0].isupper() and len(part) > 2:
-                brand = part.rstrip('.,')
-                break
+brand_size_extractor = BrandSizeExtractor(BRAND_CANONICAL, SKIP_WORDS)
+
 
-    return brand, size
+def extract_brand_size_from_name(name: str):
+    """Extract brand and size (e.g. 225/45R17) from product name (compiled, memoized — see products.brand_extractor)."""
+    return brand_size_extractor.extract(name)
 
 
 def detect_season(name: str) -> str:
@@ -141,7 +119,7 @@ def detect_season(name: str) -> str:
     return 'summer'
 
 
-def get_or_create_category(name: str, categ_override: str = '') -> Category:
+def category_name_for(name: str, categ_override: str = '') -> str:
     n = (categ_override or name).lower()
     if 'agricole' in n:
         cat_name = 'Agricole'
@@ -153,203 +131,192 @@ def get_or_create_category(name: str, categ_override: str = '') -> Category:
         cat_name = 'Utilitaire'
     else:
         cat_name = 'Tourisme'
-    slug = cat_name.lower().replace('/', '-').replace(' ', '-')
-    cat, _ = Category.objects.get_or_create(slug=slug, defaults={'name': cat_name})
-    return cat
+    return cat_name
 
 
-def _extract_embedded_images(sheet) -> dict[int, list[bytes]]:
-    """
-    Return a dict mapping 0-indexed sheet row → list of embedded image bytes.
-    Supports multiple images per row (up to 3 for image, image_2, image_3).
+def parse_excel_sheets(source, filename: str = '', on_load=None):
     """
-    img_map: dict[int, list[bytes]] = {}
-    for img in getattr(sheet, '_images', []):
-        anchor = img.anchor
-        if hasattr(anchor, '_from'):
-            row_idx = anchor._from.row  # 0-indexed
-            try:
-                data = img._data()
-                if data:
-                    if row_idx not in img_map:
-                        img_map[row_idx] = []
-                    img_map[row_idx].append(data)
-            except Exception:
-                pass
-    return img_map
-
-
-def parse_excel_file(file_content: bytes, filename: str = '') -> list[dict]:
+    Parse an Excel file (.xlsx or .xls) given by path or content, sheet after
+    sheet (streaming — see products.excel_reader), and yield one
+    `(headers, rows)` pair per sheet: its normalized header line, and a
+    generator of `(line, values, images)` for each non-empty row below it —
+    `line` is the 1-based sheet row, `values` is padded to the header width,
+    `images` are the pictures embedded on the row (read on access) or None.
+    `on_load`: see excel_reader.iter_sheets.
     """
-    Parse Excel file content (.xlsx or .xls) and return list of row dicts.
-    For .xlsx files, embedded images are stored under the key '__embedded_image__'
-    as raw bytes in each row dict.
-    """
-    rows = []
-    ext = filename.lower().rsplit('.', 1)[-1] if '.' in filename else 'xlsx'
-
-    if ext == 'xls':
-        import xlrd
-        wb = xlrd.open_workbook(file_contents=file_content)
-        for sheet in wb.sheets():
-            headers = None
-            for row_idx in range(sheet.nrows):
-                row = [sheet.cell_value(row_idx, col) for col in range(sheet.ncols)]
-                if headers is None:
-                    if any(c != '' for c in row):
-                        headers = [normalize_col(str(c)) if c != '' else '' for c in row]
-                    continue
-                if all(c == '' or c is None for c in row):
-                    continue
-                row_dict = {headers[i]: row[i] for i in range(min(len(headers), len(row)))}
-                rows.append(row_dict)
-    else:
-        wb = openpyxl.load_workbook(io.BytesIO(file_content), data_only=True)
-        for sheet in wb.worksheets:
-            # Extract all embedded images indexed by 0-based sheet row
-            embedded_images = _extract_embedded_images(sheet)
-
-            headers = None
-            sheet_row_idx = -1
-
-            for row in sheet.iter_rows(values_only=True):
-                sheet_row_idx += 1
+    for sheet in excel_reader.iter_sheets(source, filename, on_load):
+        rows = sheet.rows()
+        for _, row, _ in rows:
+            if any(c is not None and c != '' for c in row):
+                headers = [normalize_col(str(c)) if c is not None and c != '' else '' for c in row]
+                yield headers, _data_rows(rows, len(headers))
+                break
 
-                if headers is None:
-                    if any(cell is not None for cell in row):
-                        headers = [normalize_col(str(c)) if c is not None else '' for c in row]
-                    continue
 
-                if all(cell is None for cell in row):
-                    continue
+def _data_rows(rows, width: int):
+    for sheet_row_idx, row, images in rows:
+        if all(c is None or c == '' for c in row):
+            continue
+        # read-only mode drops trailing empty cells: pad to the header width
+        if len(row) != width:
+            row = tuple(row[:width]) + (None,) * (width - len(row))
+        yield sheet_row_idx + 1, row, images
 
-                row_dict = {headers[i]: row[i] for i in range(min(len(headers), len(row)))}
 
-                # Attach list of embedded image bytes if any exist at this row
-                if sheet_row_idx in embedded_images:
-                    row_dict['__embedded_images__'] = embedded_images[sheet_row_idx]
+class ColumnPlan:
+    """
+    Header → product field mapping of one sheet, resolved once from its
+    normalized headers. map_rows() then maps a chunk of rows by position,
+    one pass per column: text fields keep the first non-empty column, price
+    and stock are parsed as whole columns with pandas / NumPy.
+    """
+    TEXT_FIELDS = (
+        ('name', NAME_PRIMARY),
+        ('name_fallback', NAME_FALLBACK),
+        ('reference', REFERENCE_ALIASES),
+        ('categ', CATEG_ALIASES),
+        ('description', DESCRIPTION_ALIASES),
+        ('brand', BRAND_ALIASES),
+        ('size', SIZE_ALIASES),
+        ('image', IMAGE_ALIASES),
+    )
 
-                rows.append(row_dict)
-    return rows
+    def __init__(self, headers: list[str]):
+        # En-tête répété : seule sa dernière colonne compte (comme l'ancien dict par ligne)
+        last = {header: i for i, header in enumerate(headers)}
+        positions = [last[header] for header in dict.fromkeys(headers)]
+        self.text_columns = {
+            field: [i for i in positions if headers[i] in aliases] for field, aliases in self.TEXT_FIELDS
+        }
+        self.price_columns = [i for i in positions if headers[i] in PRICE_ALIASES]
+        self.stock_columns = [i for i in positions if headers[i] in STOCK_ALIASES]
+
+    @staticmethod
+    def _first_text(columns: list[list], size: int, keep_blank: bool = False) -> list:
+        """First truthy cell of each row across `columns`, stripped (None if none)."""
+        blank = '' if keep_blank else None
+        values = [None] * size
+        for column in columns:
+            values = [
+                current if current is not None or not cell else str(cell).strip() or blank
+                for current, cell in zip(values, column)
+            ]
+        return values
+
+    @staticmethod
+    def _numbers(column: list, clean: bool = False):
+        """float(str(cell)) of a whole column, NaN where the cell is not a number."""
+        import numpy as np
+        import pandas as pd
+
+        text = pd.Series(column, dtype=object).astype(str)
+        if clean:
+            text = (
+                text.str.replace(',', '.', regex=False)
+                .str.replace(' ', '', regex=False)
+                .str.replace('\xa0', '', regex=False)
+            )
+        # to_numeric repère les cellules numériques ; NumPy les convertit exactement
+        # (mêmes valeurs que float(), to_numeric arrondit parfois au dernier bit)
+        valid = pd.to_numeric(text, errors='coerce').notna().to_numpy()
+        numbers = np.full(len(column), np.nan)
+        numbers[valid] = text.to_numpy(dtype=str)[valid].astype(np.float64)
+        return numbers
+
+    def map_rows(self, rows: list, images: list) -> list[dict | None]:
+        """Map positional rows (with their embedded images) to product field dicts, None if name or price missing."""
+        import numpy as np
+
+        size = len(rows)
+        used = {i for columns in self.text_columns.values() for i in columns}
+        used.update(self.price_columns, self.stock_columns)
+        cells = {i: [row[i] for row in rows] for i in used}
+
+        texts = {
+            field: self._first_text([cells[i] for i in columns], size, keep_blank=field.startswith('name'))
+            for field, columns in self.text_columns.items()
+        }
+        price = np.full(size, np.nan)
+        for i in self.price_columns:
+            price = np.where(np.isnan(price), self._numbers(cells[i], clean=True), price)
+        stock = np.zeros(size)  # Import catalogue only — stock managed via Achats
+        for i in self.stock_columns:
+            parsed = self._numbers(cells[i])
+            stock = np.where(np.isfinite(parsed), np.trunc(parsed), stock)
+
+        mapped = []
+        for k, (row_price, row_stock) in enumerate(zip(price.tolist(), stock.tolist())):
+            name = texts['name'][k] or texts['name_fallback'][k]
+            if not name or math.isnan(row_price):
+                mapped.append(None)
+                continue
+            brand = texts['brand'][k] or ''
+            size_ = texts['size'][k] or ''
+
+            # Try to extract brand and size from the name if not already set
+            if not brand or not size_:
+                auto_brand, auto_size = extract_brand_size_from_name(name)
+                brand = brand or auto_brand
+                size_ = size_ or auto_size
+
+            # Normaliser la marque vers le nom officiel
+            brand_canonical = BRAND_CANONICAL.get(brand.lower().strip())
+            if brand_canonical is not None:
+                brand = brand_canonical  # '' si 'unknown'
+
+            mapped.append({
+                'name': name,
+                'price': round(row_price, 3),
+                'description': texts['description'][k] or '',
+                'stock': int(row_stock),
+                'reference': texts['reference'][k] or '',
+                'brand': brand,
+                'size': size_,
+                'image': texts['image'][k] or '',
+                'embedded_images': images[k] or [],
+                'season': detect_season(name),
+                'categ': texts['categ'][k] or '',
+            })
+        return mapped
+
+
+def iter_mapped_rows(source, filename: str = '', chunk_size: int = IMPORT_MAP_CHUNK_SIZE, on_load=None):
+    """Yield `(line, product_data)` for each data row of the file — product_data None if name or price missing."""
+    for headers, rows in parse_excel_sheets(source, filename, on_load):
+        plan = ColumnPlan(headers)
+        while chunk := list(islice(rows, chunk_size)):
+            lines, values, images = zip(*chunk)
+            yield from zip(lines, plan.map_rows(values, images))
 
 
 def map_row_to_product(row: dict) -> dict | None:
-    """Map a row dict to product field dict. Returns None if name or price missing."""
-    name = None
-    name_fallback = None
-    price = None
-    description = ''
-    stock = 0  # Import catalogue only — stock managed via Achats
-    reference = ''
-    brand = ''
-    size = ''
-    image = ''
-    categ = ''
-    embedded_images = row.get('__embedded_images__') or []  # list of bytes
-
-    for col, val in row.items():
-        if col == '__embedded_images__':
-            continue
-        col_n = normalize_col(col)
-        if col_n in NAME_PRIMARY and name is None and val:
-            name = str(val).strip()
-        if col_n in NAME_FALLBACK and name_fallback is None and val:
-            name_fallback = str(val).strip()
-        if col_n in REFERENCE_ALIASES and not reference and val:
-            reference = str(val).strip()
-        if col_n in CATEG_ALIASES and not categ and val:
-            categ = str(val).strip()
-        if col_n in PRICE_ALIASES and price is None and val is not None:
-            try:
-                price = float(str(val).replace(',', '.').replace(' ', '').replace('\xa0', ''))
-            except (ValueError, TypeError):
-                pass
-        if col_n in DESCRIPTION_ALIASES and not description and val:
-            description = str(val).strip()
-        if col_n in STOCK_ALIASES and val is not None:
-            try:
-                stock = int(float(str(val)))
-            except (ValueError, TypeError):
-                pass
-        if col_n in BRAND_ALIASES and not brand and val:
-            brand = str(val).strip()
-        if col_n in SIZE_ALIASES and not size and val:
-            size = str(val).strip()
-        if col_n in IMAGE_ALIASES and not image and val:
-            image = str(val).strip()
-
-    if not name:
-        name = name_fallback
-    if not name or price is None:
-        return None
-
-    # Try to extract brand and size from the name if not already set
-    if not brand or not size:
-        auto_brand, auto_size = extract_brand_size_from_name(name)
-        brand = brand or auto_brand
-        size = size or auto_size
-
-    # Normaliser la marque vers le nom officiel
-    brand_canonical = BRAND_CANONICAL.get(brand.lower().strip())
-    if brand_canonical is not None:
-        brand = brand_canonical  # '' si 'unknown'
+    """Map a single row dict to product field dict. Returns None if name or price missing."""
+    row = dict(row)
+    images = row.pop('__embedded_images__', None)
+    plan = ColumnPlan([normalize_col(col) for col in row])
+    return plan.map_rows([tuple(row.values())], [images])[0]
 
-    return {
-        'name': name,
-        'price': round(price, 3),
-        'description': description,
-        'stock': stock,
-        'reference': reference,
-        'brand': brand,
-        'size': size,
-        'image': image,
-        'embedded_images': embedded_images,
-        'season': detect_season(name),
-        'categ': categ,
-    }
 
-
-def _resolve_image(image_val, embedded_bytes: bytes | None = None) -> str:
+def _resolve_image(image_val, embedded_url: str = '', upload: bool = True) -> str:
     """
     Resolve the best available image to a URL:
     1. If image_val is a non-empty http(s) URL → return as-is
-    2. If embedded_bytes provided → upload to Cloudinary (with MD5 dedup cache)
-    3. Otherwise → return ''
+    2. If the row has an embedded image → its URL from the ImagePipeline
+    3. Otherwise → try uploading image_val as a path/base64 string, else ''
+       (skipped when `upload` is False — dry-run)
     """
-    global _image_cache
-
     # Priority 1: explicit URL in cell
     if image_val:
         val = str(image_val).strip()
         if val.startswith('http://') or val.startswith('https://'):
             return val
 
-    # Priority 2: embedded image bytes
-    if embedded_bytes:
-        img_hash = hashlib.md5(embedded_bytes).hexdigest()
-
-        # Check cache first (same image reused for many products)
-        if img_hash in _image_cache:
-            return _image_cache[img_hash]
-
-        try:
-            import cloudinary.uploader
-            result = cloudinary.uploader.upload(
-                io.BytesIO(embedded_bytes),
-                folder='pneushop/products',
-                public_id=f'tire_{img_hash}',
-                overwrite=False,
-                resource_type='image',
-            )
-            url = result.get('secure_url', '')
-            if url:
-                _image_cache[img_hash] = url
-            return url
-        except Exception:
-            return ''
+    # Priority 2: embedded image (uploaded / deduplicated up front)
+    if embedded_url:
+        return embedded_url
 
     # Priority 3: try uploading image_val as a path/base64 string
-    if image_val:
+    if image_val and upload:
         val = str(image_val).strip()
         try:
             import cloudinary.uploader
@@ -370,117 +337,117 @@ def _status_to_frontend(db_status: str) -> str:
     return {
         'queued': 'queued',
         'running': 'processing',
+        'previewed': 'previewed',
         'done': 'completed',
         'failed': 'failed',
     }.get(db_status, db_status)
 
 
-def _run_import_job(job: 'ImportJob', content: bytes, filename: str):
+def _save_progress(job: 'ImportJob', importer: ProductImporter):
+    """
+    Save the counts so far so import_status shows live progress. The pending
+    batch is left alone: it is written when it reaches the importer's
+    batch_size, so `created` counts the products already written.
     """
-    Core import processing: parses the Excel content and creates/updates
+    job.created_count = importer.imported_count
+    job.unchanged_count = importer.unchanged_count
+    job.skipped_count = importer.skipped_count
+    job.error_count = len(importer.errors)
+    job.rows_per_second = importer.rows_per_second
+    job.save(update_fields=['created_count', 'unchanged_count', 'skipped_count', 'error_count',
+                            'rows_per_second', 'updated_at'])
+
+
+def _run_import_job(job: 'ImportJob', source, filename: str):
+    """
+    Core import processing: parses the Excel file (path or content) and creates/updates
     products, attaching `import_job=job` to newly-created products so they
     can later be removed if the import file itself is deleted.
+    Writes go through ProductImporter (bulk, batched — see products.importer).
+    With `job.dry_run` nothing is written: the changeset is stored on the job
+    (status 'previewed') for apply_import_changeset.
     Mutates `job` (status, counts, etc.) and saves it.
     """
-    # Clear the per-request image cache so hashes don't bleed between imports
-    _image_cache.clear()
-
-    errors = []
-    created_count = 0
-    created_names = []
-    images_uploaded = 0
-    total_rows = 0
-
     try:
-        rows = parse_excel_file(content, filename)
-        total_rows = len(rows)
-        job.total_rows = total_rows
+        # Estimation depuis les dimensions des feuilles (barre de progression),
+        # le compte exact est enregistré en fin d'import
+        job.total_rows = excel_reader.estimate_rows(source, filename)
         job.save(update_fields=['total_rows'])
 
-        for i, row in enumerate(rows):
-            product_data = map_row_to_product(row)
+        # Images intégrées : hachées, dédupliquées (table ImportImage) et
+        # envoyées en parallèle avant la boucle des lignes
+        dry_run = job.dry_run
+        images = ImagePipeline(upload=not dry_run)
+        images.prepare(source, filename)
+
+        def sheet_loaded(nrows: int):
+            # .xls : nombre de lignes connu seulement au chargement de chaque feuille
+            job.total_rows += nrows
+            job.save(update_fields=['total_rows', 'updated_at'])
+
+        importer = ProductImporter(job, dry_run=dry_run)
+        total_rows = 0
+        for line, product_data in iter_mapped_rows(source, filename, on_load=sheet_loaded):
+            if total_rows and total_rows % IMPORT_PROGRESS_EVERY == 0:
+                _save_progress(job, importer)
+            total_rows += 1
             if product_data is None:
-                errors.append(f'Ligne {i + 2}: Nom ou prix manquant — ignoré.')
+                importer.error(f'Ligne {line}: Nom ou prix manquant — ignoré.')
+                continue
+            embedded_imgs = product_data.get('embedded_images')
+            fingerprint = row_fingerprint(product_data, images.hashes(embedded_imgs))
+            if importer.skip_unchanged(product_data, fingerprint):
                 continue
             try:
-                category = get_or_create_category(product_data['name'], product_data.get('categ', ''))
-                slug_base = re.sub(r'[^a-z0-9]+', '-', product_data['name'].lower())[:200]
-
-                # Check if product with same reference already exists
-                existing = None
-                if product_data['reference']:
-                    existing = Product.objects.filter(reference=product_data['reference']).first()
-
                 # Résoudre jusqu'à 3 images (image principale + image_2 + image_3)
-                embedded_imgs = product_data.get('embedded_images', [])
-                image_url  = _resolve_image(product_data.get('image', ''), embedded_imgs[0] if len(embedded_imgs) > 0 else None)
-                image_url2 = _resolve_image('', embedded_imgs[1] if len(embedded_imgs) > 1 else None)
-                image_url3 = _resolve_image('', embedded_imgs[2] if len(embedded_imgs) > 2 else None)
-                any_image = bool(image_url or image_url2 or image_url3)
-
-                if existing:
-                    # Le prix de la colonne Excel est le prix d'achat (HT) ; le prix de
-                    # vente affiché (catalogue, front, back) = prix d'achat * 1.15 * 1.19
-                    existing.purchase_price = product_data['price']
-                    existing.price = round(product_data['price'] * 1.15 * 1.19, 3)
-                    if product_data['description']:
-                        existing.description = product_data['description']
-                    update_fields = ['price', 'purchase_price', 'updated_at']
-                    if product_data['description']:
-                        update_fields.append('description')
-                    if not existing.image and image_url:
-                        existing.image = image_url
-                        update_fields.append('image')
-                    if not existing.image_2 and image_url2:
-                        existing.image_2 = image_url2
-                        update_fields.append('image_2')
-                    if not existing.image_3 and image_url3:
-                        existing.image_3 = image_url3
-                        update_fields.append('image_3')
-                    if any_image:
-                        images_uploaded += 1
-                    existing.save(update_fields=update_fields)
-                else:
-                    # Ensure slug is unique
-                    slug = slug_base
-                    counter = 1
-                    while Product.objects.filter(slug=slug).exists():
-                        slug = f'{slug_base}-{counter}'
-                        counter += 1
-
-                    if any_image:
-                        images_uploaded += 1
-
-                    Product.objects.create(
-                        name=product_data['name'],
-                        slug=slug,
-                        description=product_data['description'],
-                        price=round(product_data['price'] * 1.15 * 1.19, 3),
-                        purchase_price=product_data['price'],
-                        brand=product_data['brand'],
-                        size=product_data['size'],
-                        season=product_data['season'],
-                        stock=0,  # Stock = 0 — géré exclusivement via les Achats
-                        reference=product_data['reference'],
-                        category=category,
-                        image=image_url,
-                        image_2=image_url2 or None,
-                        image_3=image_url3 or None,
-                        is_active=True,
-                        import_job=job,
-                    )
-                    created_names.append(product_data['name'])
-                created_count += 1
+                image_url  = _resolve_image(product_data.get('image', ''), images.url(embedded_imgs, 0), upload=not dry_run)
+                image_url2 = images.url(embedded_imgs, 1)
+                image_url3 = images.url(embedded_imgs, 2)
+
+                importer.add(
+                    line, product_data,
+                    category_name=category_name_for(product_data['name'], product_data.get('categ', '')),
+                    images=(image_url, image_url2, image_url3),
+                    # Image en échec : pas d'empreinte, la ligne sera retraitée au prochain import
+                    fingerprint=fingerprint if images.uploaded_all(embedded_imgs) else '',
+                )
             except Exception as e:
-                errors.append(f'Ligne {i + 2} ({product_data.get("name", "?")}): {str(e)}')
-
-        job.status = 'done'
-        job.created_count = created_count
-        job.created_names = created_names
-        job.error_count = len(errors)
-        job.errors = errors
-        job.images_processed = images_uploaded
-        job.message = f'{created_count} produit(s) importé(s) dont {images_uploaded} avec image, {len(errors)} erreur(s).'
+                importer.error(f'Ligne {line} ({product_data.get("name", "?")}): {str(e)}')
+        importer.finish()
+
+        job.total_rows = total_rows
+        job.created_count = importer.imported_count
+        job.unchanged_count = importer.unchanged_count
+        job.skipped_count = importer.skipped_count
+        job.created_names = importer.created_names
+        job.error_count = len(importer.errors)
+        job.errors = importer.errors
+        job.images_processed = importer.images_count
+        job.rows_per_second = importer.rows_per_second
+        if dry_run:
+            job.status = 'previewed'
+            job.changeset = importer.changeset
+            summary = _changeset_summary(importer.changeset)
+            job.message = (
+                f"Aperçu : {summary['creates']} création(s), {summary['updates']} mise(s) à jour, "
+                f"{summary['unchanged']} inchangé(s), {summary['skipped']} ligne(s) ignorée(s) (identiques au dernier import), "
+                f"{summary['rejects']} ligne(s) rejetée(s) — rien n'a été écrit."
+            )
+            if images.pending:
+                job.message += f' {images.pending} image(s) à envoyer.'
+        else:
+            job.status = 'done'
+            job.message = (
+                f'{importer.imported_count} produit(s) importé(s) dont {importer.images_count} avec image, '
+                f'{importer.unchanged_count} inchangé(s), '
+                f'{importer.skipped_count} ligne(s) ignorée(s) (identiques au dernier import), '
+                f'{len(importer.errors)} erreur(s) — {importer.rows_per_second} lignes/s.'
+            )
+        if images.uploaded or images.reused or images.failed:
+            job.message += (
+                f' Images : {images.uploaded} envoyée(s), {images.reused} déjà connue(s)'
+                + (f', {images.failed} en échec.' if images.failed else '.')
+            )
         job.finished_at = timezone.now()
         job.save()
 
@@ -496,8 +463,9 @@ def _run_import_job(job: 'ImportJob', content: bytes, filename: str):
 def import_excel(request):
     """
     POST /api/products/import/excel/
-    Accepts a multipart file upload, parses the Excel, creates products,
-    and returns a job_id with status. Legacy single-shot endpoint.
+    Accepts a multipart file upload, stores it and queues the import
+    (processed by the import_worker command). Returns a job_id to poll.
+    Legacy single-shot endpoint.
     """
     file = request.FILES.get('file')
     if not file:
@@ -507,15 +475,34 @@ def import_excel(request):
     if ext not in ('xlsx', 'xls'):
         return Response({'error': 'Format invalide. Seuls .xlsx et .xls sont acceptés.'}, status=400)
 
+    stored_path, _ = _store_import_file(file)
     job = ImportJob.objects.create(
         original_filename=file.name,
-        status='running',
-        started_at=timezone.now(),
+        status='queued',
+        file_path=stored_path,
     )
+    import_queue.enqueue(job)
+    return _job_started_response(job)
+
+
+def _store_import_file(file) -> tuple[str, str]:
+    """
+    Copy an uploaded file to MEDIA_ROOT/imports/ chunk by chunk, computing its
+    MD5 on the way: the content is never held whole in the web process (the
+    parser then reads the stored file by path). Returns (stored path, md5).
+    """
+    imports_dir = os.path.join(settings.MEDIA_ROOT, 'imports')
+    os.makedirs(imports_dir, exist_ok=True)
+    stored_path = os.path.join(imports_dir, f'{uuid.uuid4()}_{file.name}')
+    file_hash = hashlib.md5()
+    with open(stored_path, 'wb') as f:
+        for chunk in file.chunks(IMPORT_UPLOAD_CHUNK_SIZE):
+            file_hash.update(chunk)
+            f.write(chunk)
+    return stored_path, file_hash.hexdigest()
 
-    content = file.read()
-    _run_import_job(job, content, file.name)
 
+def _job_started_response(job: 'ImportJob') -> Response:
     if job.status == 'failed':
         return Response({
             'job_id': str(job.id),
@@ -528,7 +515,7 @@ def import_excel(request):
         'status': _status_to_frontend(job.status),
         'message': job.message,
         'status_endpoint': f'/api/products/import/status/{job.id}/',
-    }, status=201)
+    }, status=202 if job.status in ('queued', 'running') else 200)
 
 
 @api_view(['POST'])
@@ -548,21 +535,12 @@ def upload_import_file(request):
     if ext not in ('xlsx', 'xls'):
         return Response({'error': 'Format invalide. Seuls .xlsx et .xls sont acceptés.'}, status=400)
 
-    content = file.read()
-    file_hash = hashlib.md5(content).hexdigest()
+    stored_path, file_hash = _store_import_file(file)
 
     if ImportJob.objects.filter(file_hash=file_hash).exists():
+        os.remove(stored_path)
         return Response({'error': 'Ce fichier a déjà été importé précédemment. Veuillez sélectionner un fichier différent.'}, status=409)
 
-    import os
-    from django.conf import settings
-    imports_dir = os.path.join(settings.MEDIA_ROOT, 'imports')
-    os.makedirs(imports_dir, exist_ok=True)
-    stored_name = f'{uuid.uuid4()}_{file.name}'
-    stored_path = os.path.join(imports_dir, stored_name)
-    with open(stored_path, 'wb') as f:
-        f.write(content)
-
     job = ImportJob.objects.create(
         original_filename=file.name,
         status='uploaded',
@@ -588,8 +566,10 @@ def list_import_files(request):
 @permission_classes([IsAuthenticated])
 def run_import_file(request, job_id):
     """
-    POST /api/products/import/files/<job_id>/run/
-    Processes a previously-uploaded file and creates/updates products.
+    POST /api/products/import/files/<job_id>/run/[?dry_run=true]
+    Queues a previously-uploaded file for processing (import_worker command);
+    the frontend then polls import_status. With dry_run=true the job only
+    computes the changeset (status 'previewed'), see apply_import_changeset.
     """
     try:
         job = ImportJob.objects.get(id=job_id)
@@ -599,28 +579,127 @@ def run_import_file(request, job_id):
     if not job.file_path or not os.path.exists(job.file_path):
         return Response({'error': 'Le fichier stocké est introuvable.'}, status=404)
 
-    job.status = 'running'
-    job.started_at = timezone.now()
-    job.save(update_fields=['status', 'started_at'])
+    if job.status in ('queued', 'running'):
+        return Response({'error': 'Cet import est déjà en cours.'}, status=409)
 
-    with open(job.file_path, 'rb') as f:
-        content = f.read()
+    job.dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+    job.apply_requested = False
+    job.changeset = None
+    job.save(update_fields=['dry_run', 'apply_requested', 'changeset', 'updated_at'])
+    import_queue.enqueue(job)
+    return _job_started_response(job)
 
-    _run_import_job(job, content, job.original_filename)
 
-    if job.status == 'failed':
-        return Response({
-            'job_id': str(job.id),
-            'status': 'failed',
-            'message': job.message,
-        }, status=500)
+def _changeset_summary(changeset: dict) -> dict:
+    return {
+        'creates': len(changeset.get('creates', [])),
+        'updates': len(changeset.get('updates', [])),
+        'unchanged': changeset.get('unchanged', 0),
+        'skipped': changeset.get('skipped', 0),
+        'rejects': len(changeset.get('rejects', [])),
+    }
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def import_changeset(request, job_id):
+    """
+    GET /api/products/import/files/<job_id>/changeset/
+    Returns the changeset computed by a dry-run: products to create, updates
+    (old → new price / description / images) and rejected rows.
+    """
+    try:
+        job = ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return Response({'error': 'Fichier introuvable.'}, status=404)
+
+    if job.changeset is None:
+        return Response({'error': "Aucun aperçu pour ce fichier. Lancez d'abord un import en dry-run."}, status=404)
 
     return Response({
         'job_id': str(job.id),
         'status': _status_to_frontend(job.status),
-        'message': job.message,
-        'status_endpoint': f'/api/products/import/status/{job.id}/',
-    }, status=200)
+        'summary': _changeset_summary(job.changeset),
+        **job.changeset,
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def apply_import_changeset(request, job_id):
+    """
+    POST /api/products/import/files/<job_id>/apply/
+    Queues the previewed changeset for the import_worker command, which
+    applies it in one transaction (see _apply_import_job); the frontend then
+    polls import_status. Only rows whose values still differ from the
+    catalogue are written.
+    """
+    try:
+        job = ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return Response({'error': 'Fichier introuvable.'}, status=404)
+
+    # Bascule atomique : deux clics simultanés n'appliquent pas deux fois l'aperçu
+    if job.changeset is None or not ImportJob.objects.filter(id=job.id, status='previewed').update(
+        status='queued', apply_requested=True, updated_at=timezone.now(),
+    ):
+        return Response({'error': "Aucun aperçu à appliquer pour ce fichier."}, status=409)
+
+    job.refresh_from_db()
+    import_queue.enqueue(job)
+    return _job_started_response(job)
+
+
+def _apply_import_job(job: 'ImportJob'):
+    """
+    Worker side of apply_import_changeset: uploads the pictures the dry-run
+    left pending, then writes the changeset. On failure the job goes back to
+    'previewed' so the preview can be applied again.
+    Mutates `job` and saves it.
+    """
+    changeset = job.changeset
+    try:
+        _upload_pending_images(job, changeset)
+        importer = apply_changeset(job, changeset)
+    except Exception as e:
+        job.status = 'previewed'
+        job.apply_requested = False
+        job.message = f"Échec de l'application de l'aperçu : {e}"
+        job.finished_at = timezone.now()
+        job.save()
+        return
+
+    job.status = 'done'
+    job.dry_run = False
+    job.apply_requested = False
+    job.created_count = importer.imported_count
+    job.unchanged_count = changeset.get('unchanged', 0) + importer.unchanged_count
+    job.skipped_count = changeset.get('skipped', 0)
+    job.created_names = importer.created_names
+    job.errors = changeset.get('rejects', []) + importer.errors
+    job.error_count = len(job.errors)
+    job.images_processed = importer.images_count
+    job.message = (
+        f'Aperçu appliqué : {importer.imported_count} produit(s) importé(s), '
+        f'{job.unchanged_count} inchangé(s), {job.skipped_count} ligne(s) ignorée(s), {job.error_count} erreur(s).'
+    )
+    job.finished_at = timezone.now()
+    job.save()
+
+
+def _upload_pending_images(job: 'ImportJob', changeset: dict):
+    """Upload the embedded pictures a dry-run left as placeholders, in place in the changeset rows."""
+    rows = [entry['row'] for entry in changeset.get('creates', []) + changeset.get('updates', [])]
+    if not any(url.startswith(PENDING_IMAGE_PREFIX) for row in rows for url in row['images']):
+        return
+    images = ImagePipeline()
+    if job.file_path and os.path.exists(job.file_path):
+        images.prepare(job.file_path, job.original_filename)
+    for row in rows:
+        resolved = [images.resolve(url) for url in row['images']]
+        if any(url.startswith(PENDING_IMAGE_PREFIX) and not new for url, new in zip(row['images'], resolved)):
+            row['fingerprint'] = ''  # image en échec : la ligne sera retraitée au prochain import
+        row['images'] = resolved
 
 
 @api_view(['DELETE'])
@@ -659,6 +738,8 @@ def _job_to_file_entry(job: 'ImportJob') -> dict:
         'summary': {
             'total_rows': job.total_rows,
             'created': job.created_count,
+            'unchanged': job.unchanged_count,
+            'skipped': job.skipped_count,
             'errors': job.error_count,
         },
         'message': job.message,
@@ -684,9 +765,13 @@ def import_status(request, job_id):
         'summary': {
             'total_rows': job.total_rows,
             'created': job.created_count,
+            'unchanged': job.unchanged_count,
+            'skipped': job.skipped_count,
             'errors': job.error_count,
             'images_processed': job.images_processed,
+            'rows_per_second': job.rows_per_second,
         },
+        'changeset': _changeset_summary(job.changeset) if job.changeset is not None else None,
         'created_names': job.created_names or [],
         'errors': job.errors,
     })
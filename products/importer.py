@@ -0,0 +1,394 @@
+"""
+Batched write path of the Excel product import (see import_views._run_import_job).
+
+Instead of 4-5 queries per row (reference lookup, slug loop, category
+get_or_create, save), ProductImporter:
+  - loads every existing reference and slug once, into dicts/sets;
+  - resolves categories from an in-memory map (created on first use);
+  - buffers the rows and writes them with bulk_create / bulk_update,
+    one transaction per batch of `batch_size` rows.
+
+bulk_create / bulk_update do not send post_save, so the derived catalogue
+structures (search index, autocomplete, HTTP cache version — the facets
+are cached under that version) are refreshed explicitly after each batch —
+see _after_commit().
+
+Existing products are only rewritten when a value actually changes (price,
+description, images); identical rows are counted as unchanged.
+
+Incremental re-import: each imported row leaves a fingerprint (row_fingerprint)
+per supplier reference in ImportFingerprint, written in the same transaction
+as the products. A later file skips the rows whose fingerprint did not change
+(skip_unchanged) before any image resolution or write.
+
+Dry-run (`dry_run=True`): nothing is written — not even a missing category —
+and finish() leaves the would-be writes in `changeset` (creates, updates with
+their old → new values, rejected rows), a JSON document stored on the
+ImportJob. apply_changeset() later replays it in one transaction against the
+then-current catalogue.
+"""
+import hashlib
+import json
+import re
+import time
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, Product, ImportJob, ImportFingerprint
+
+# Prix de vente = prix d'achat (colonne Excel, HT) * marge 1.15 * TVA 1.19
+SALE_PRICE_FACTOR = 1.15 * 1.19
+
+# Champs réécrits sur un produit existant (bulk_update)
+UPDATE_FIELDS = ['price', 'purchase_price', 'description', 'image', 'image_2', 'image_3', 'updated_at']
+
+# Champs comparés / affichés dans l'aperçu (dry-run)
+DIFF_FIELDS = ['price', 'purchase_price', 'description', 'image', 'image_2', 'image_3']
+
+# Champs d'une ligne mappée couverts par son empreinte (+ hash des images intégrées)
+FINGERPRINT_FIELDS = ('name', 'price', 'description', 'brand', 'size', 'season', 'reference', 'categ', 'image')
+
+# Champs chargés pour les produits existants
+EXISTING_FIELDS = ('pk', 'reference', 'name', 'category', *DIFF_FIELDS)
+
+
+def _decimal(value: float) -> Decimal:
+    return Decimal(str(round(value, 3)))
+
+
+def row_fingerprint(data: dict, image_hashes: list[str]) -> str:
+    """MD5 of a mapped row (import_views.ColumnPlan.map_rows) and of its embedded pictures."""
+    payload = [data.get(field, '') for field in FINGERPRINT_FIELDS] + list(image_hashes)
+    return hashlib.md5(json.dumps(payload, default=str).encode()).hexdigest()
+
+
+def _json_value(value):
+    return str(value) if isinstance(value, Decimal) else (value or '')
+
+
+class ProductImporter:
+    def __init__(self, job, batch_size: int = 500, dry_run: bool = False):
+        self.job = job
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.changeset: dict | None = None
+        self.errors: list[str] = []
+        self.created_names: list[str] = []
+        self.imported_count = 0
+        self.unchanged_count = 0
+        self.skipped_count = 0
+        self.images_count = 0
+        self.rows_seen = 0
+        self.started = time.monotonic()
+
+        self._pending: list[tuple[int, dict, str, Product, bool]] = []  # (line, data, category, product, is_new)
+        self._queued: set[int] = set()  # id() of the products in _pending
+        self._originals: dict[int, dict] = {}  # id(product) → DIFF_FIELDS as last written
+        self._counted: set[int] = set()  # id() of the products already counted as imported
+        self._by_reference: dict[str, Product] = {}
+        for product in Product.objects.exclude(reference='').only(*EXISTING_FIELDS).order_by('pk').iterator(chunk_size=5000):
+            self._by_reference.setdefault(product.reference, product)
+        self._slugs: set[str] = set(Product.objects.exclude(slug=None).values_list('slug', flat=True).iterator(chunk_size=5000))
+        self._categories: dict[str, Category] = {category.slug: category for category in Category.objects.all()}
+        self._stored_fingerprints: dict[str, str] = dict(
+            ImportFingerprint.objects.values_list('reference', 'fingerprint').iterator(chunk_size=5000)
+        )
+        self._fingerprints: dict[str, str] = {}  # reference → empreinte, écrites au prochain flush
+        self._seen_references: set[str] = set()
+
+    # ─── Lookups ─────────────────────────────────────────────────────────────
+
+    def category(self, cat_name: str) -> Category:
+        slug = cat_name.lower().replace('/', '-').replace(' ', '-')
+        category = self._categories.get(slug)
+        if category is None:
+            if self.dry_run:
+                category = Category(slug=slug, name=cat_name)
+            else:
+                category, _ = Category.objects.get_or_create(slug=slug, defaults={'name': cat_name})
+            self._categories[slug] = category
+        return category
+
+    def unique_slug(self, name: str) -> str:
+        slug_base = re.sub(r'[^a-z0-9]+', '-', name.lower())[:200]
+        slug = slug_base
+        counter = 1
+        while slug in self._slugs:
+            slug = f'{slug_base}-{counter}'
+            counter += 1
+        self._slugs.add(slug)
+        return slug
+
+    # ─── Rows ────────────────────────────────────────────────────────────────
+
+    def skip_unchanged(self, data: dict, fingerprint: str) -> bool:
+        """
+        True (row counted as skipped) when the last import of this reference left
+        the same fingerprint and the product still exists. Once a reference has
+        been processed in this file, its later rows are never skipped, so the
+        last row of the file still wins.
+        """
+        reference = data['reference']
+        if not reference or reference in self._seen_references:
+            return False
+        self._seen_references.add(reference)
+        if self._stored_fingerprints.get(reference) == fingerprint and reference in self._by_reference:
+            self.rows_seen += 1
+            self.skipped_count += 1
+            return True
+        return False
+
+    def add(self, line: int, data: dict, category_name: str, images: tuple[str, str, str] = ('', '', ''),
+            fingerprint: str = ''):
+        """
+        Queue one mapped row (output of ColumnPlan.map_rows). Products sharing a
+        reference — in the database or earlier in the file — are updated when
+        a value differs, others created.
+        """
+        self.rows_seen += 1
+        image_url, image_url2, image_url3 = images
+        existing = self._by_reference.get(data['reference']) if data['reference'] else None
+        if fingerprint:
+            self.record_fingerprint(data['reference'], fingerprint)
+
+        if existing is not None:
+            values = {
+                'purchase_price': _decimal(data['price']),
+                'price': _decimal(data['price'] * SALE_PRICE_FACTOR),
+            }
+            if data['description']:
+                values['description'] = data['description']
+            if not existing.image and image_url:
+                values['image'] = image_url
+            if not existing.image_2 and image_url2:
+                values['image_2'] = image_url2
+            if not existing.image_3 and image_url3:
+                values['image_3'] = image_url3
+            changed = {field: value for field, value in values.items() if getattr(existing, field) != value}
+            if not changed:
+                self.unchanged_count += 1
+                return
+
+            if id(existing) not in self._originals:
+                self._originals[id(existing)] = {field: getattr(existing, field) for field in DIFF_FIELDS}
+            for field, value in changed.items():
+                setattr(existing, field, value)
+            existing.updated_at = timezone.now()
+            # Already queued in this batch (same reference twice in the file): modified in
+            # place, counted once from the net changes when the batch is written (_count)
+            if id(existing) not in self._queued:
+                self._queue(line, data, category_name, existing, existing.pk is None)
+        else:
+            product = Product(
+                name=data['name'],
+                slug=self.unique_slug(data['name']),
+                description=data['description'],
+                price=_decimal(data['price'] * SALE_PRICE_FACTOR),
+                purchase_price=_decimal(data['price']),
+                brand=data['brand'],
+                size=data['size'],
+                season=data['season'],
+                stock=0,  # Stock = 0 — géré exclusivement via les Achats
+                reference=data['reference'],
+                category=self.category(category_name),
+                image=image_url,
+                image_2=image_url2 or None,
+                image_3=image_url3 or None,
+                is_active=True,
+                import_job=self.job,
+            )
+            product.apply_tire_dimensions()
+            if data['reference']:
+                self._by_reference[data['reference']] = product
+            self._queue(line, data, category_name, product, True)
+
+        if any(images):
+            self.images_count += 1
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def record_fingerprint(self, reference: str, fingerprint: str):
+        """Fingerprint of the last row seen for `reference`, written with the next batch."""
+        if reference:
+            self._fingerprints[reference] = fingerprint
+
+    def _queue(self, line: int, data: dict, category_name: str, product: Product, is_new: bool):
+        self._pending.append((line, data, category_name, product, is_new))
+        self._queued.add(id(product))
+
+    def error(self, message: str):
+        self.rows_seen += 1
+        self.errors.append(message)
+
+    # ─── Writes ──────────────────────────────────────────────────────────────
+
+    def flush(self):
+        if self.dry_run:
+            return  # tout reste dans _pending : finish() en fait le changeset
+        pending = self._net_changes(self._pending)
+        fingerprints = self._fingerprints
+        self._pending = []
+        self._queued = set()
+        self._originals = {}
+        self._fingerprints = {}
+        if not pending:
+            self._save_fingerprints(fingerprints)
+            return
+        try:
+            with transaction.atomic():
+                self._write([p for *_, p, is_new in pending if is_new], [p for *_, p, is_new in pending if not is_new])
+                self._save_fingerprints(fingerprints)
+        except Exception:
+            # Un lot refusé (contrainte, valeur invalide…) : on rejoue ligne par ligne
+            # pour n'écarter que les lignes fautives, comme l'ancien import
+            for line, data, _, product, is_new in pending:
+                if is_new:
+                    product.pk = None  # pk éventuellement posé par le bulk_create annulé
+                    product._state.adding = True
+                try:
+                    with transaction.atomic():
+                        self._write([product] if is_new else [], [] if is_new else [product])
+                except Exception as e:
+                    if is_new:
+                        product.pk = None
+                        product._state.adding = True
+                    self.errors.append(f'Ligne {line} ({data.get("name", "?")}): {str(e)}')
+                    fingerprints.pop(data['reference'], None)
+                else:
+                    self._count(data, product, is_new)
+            self._save_fingerprints(fingerprints)
+            return
+        for _, data, _, product, is_new in pending:
+            self._count(data, product, is_new)
+
+    def _net_changes(self, pending: list) -> list:
+        """Drop the products a later row of the file set back to their stored values."""
+        changed = []
+        for entry in pending:
+            product, is_new = entry[3], entry[4]
+            before = self._originals.get(id(product))
+            if not is_new and before is not None and all(before[f] == getattr(product, f) for f in DIFF_FIELDS):
+                self.unchanged_count += 1
+            else:
+                changed.append(entry)
+        return changed
+
+    def _save_fingerprints(self, fingerprints: dict[str, str]):
+        if not fingerprints:
+            return
+        ImportFingerprint.objects.bulk_create(
+            [ImportFingerprint(reference=reference, fingerprint=fp) for reference, fp in fingerprints.items()],
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['reference'],
+            update_fields=['fingerprint', 'updated_at'],
+        )
+        self._stored_fingerprints.update(fingerprints)
+
+    def _count(self, data: dict, product: Product, is_new: bool):
+        # Une référence répétée d'un lot à l'autre est écrite deux fois, comptée une fois
+        if id(product) in self._counted:
+            return
+        self._counted.add(id(product))
+        self.imported_count += 1
+        if is_new:
+            self.created_names.append(data['name'])
+
+    def _write(self, new: list[Product], existing: list[Product]):
+        if new:
+            Product.objects.bulk_create(new, batch_size=self.batch_size)
+        if existing:
+            Product.objects.bulk_update(existing, UPDATE_FIELDS, batch_size=self.batch_size)
+        transaction.on_commit(partial(self._after_commit, new, existing))
+
+    @staticmethod
+    def _after_commit(new: list[Product], existing: list[Product]):
+        from . import http_cache
+        from .signals import index_changed
+
+        index_changed([p.pk for p in new] + [p.pk for p in existing])
+        http_cache.bump_catalogue_version()
+
+    def finish(self):
+        if self.dry_run:
+            self.changeset = self._changeset()
+        self.flush()
+
+    # ─── Dry-run ─────────────────────────────────────────────────────────────
+
+    def _changeset(self) -> dict:
+        category_names = {category.pk: category.name for category in self._categories.values() if category.pk}
+        creates, updates = [], []
+        written = set()
+        for line, data, category_name, product, is_new in self._net_changes(self._pending):
+            self._count(data, product, is_new)
+            # Valeurs finales du produit (lignes en double fusionnées), rejouées par apply_changeset()
+            row = {
+                'name': product.name,
+                'price': float(product.purchase_price),
+                'description': product.description,
+                'brand': product.brand if is_new else data['brand'],
+                'size': product.size if is_new else data['size'],
+                'season': product.season if is_new else data['season'],
+                'reference': product.reference,
+                'category': product.category.name if is_new else category_names.get(product.category_id, category_name),
+                'images': [product.image or '', product.image_2 or '', product.image_3 or ''],
+                'fingerprint': self._fingerprints.get(product.reference, '') if product.reference else '',
+            }
+            entry = {'line': line, 'reference': product.reference, 'name': product.name, 'row': row}
+            written.add(product.reference)
+            if is_new:
+                entry['price'] = str(product.price)
+                entry['category'] = row['category']
+                creates.append(entry)
+            else:
+                before = self._originals[id(product)]
+                entry['product_id'] = product.pk
+                entry['changes'] = {
+                    field: [_json_value(before[field]), _json_value(getattr(product, field))]
+                    for field in DIFF_FIELDS if before[field] != getattr(product, field)
+                }
+                updates.append(entry)
+        return {
+            'creates': creates,
+            'updates': updates,
+            'rejects': list(self.errors),
+            'unchanged': self.unchanged_count,
+            'skipped': self.skipped_count,
+            # Références sans création ni mise à jour (lignes inchangées)
+            'fingerprints': {
+                reference: fingerprint for reference, fingerprint in self._fingerprints.items()
+                if reference not in written
+            },
+        }
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.monotonic() - self.started
+        return round(self.rows_seen / elapsed, 1) if elapsed > 0 else 0.0
+
+
+def apply_changeset(job: ImportJob, changeset: dict, batch_size: int = 500) -> ProductImporter:
+    """
+    Apply a dry-run changeset in a single transaction. Rows are replayed through
+    ProductImporter against the current catalogue: a product created or edited
+    since the preview is updated rather than duplicated, and unchanged values are
+    not rewritten.
+    """
+    importer = ProductImporter(job, batch_size=batch_size)
+    with transaction.atomic():
+        for reference, fingerprint in changeset.get('fingerprints', {}).items():
+            importer.record_fingerprint(reference, fingerprint)
+        for entry in changeset.get('creates', []) + changeset.get('updates', []):
+            row = entry['row']
+            importer.add(
+                entry['line'], row,
+                category_name=row['category'],
+                images=tuple(row['images']),
+                fingerprint=row.get('fingerprint', ''),
+            )
+        importer.finish()
+    return importer
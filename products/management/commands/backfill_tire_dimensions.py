@@ -0,0 +1,67 @@
+"""
+Django management command to fill the indexed tire dimension columns
+(tire_width, tire_aspect, tire_rim, load_index, speed_rating) of existing
+products from their `size` / `name`.
+
+New and edited products are handled by Product.save(); this command is only
+needed once after the migration, or after a bulk `update()` on size/name.
+
+Usage (on VPS):
+    python manage.py backfill_tire_dimensions
+    python manage.py backfill_tire_dimensions --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from products.http_cache import bump_catalogue_version
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Parse tire sizes into the indexed dimension columns used by the catalogue filters"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Show how many products would change without saving',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of products written per bulk_update (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        fields = ['id', 'name', 'size', *Product.TIRE_DIMENSION_FIELDS]
+
+        scanned = 0
+        updated = 0
+        unparsed = 0
+        pending = []
+
+        for product in Product.objects.only(*fields).order_by('id').iterator(chunk_size=batch_size):
+            scanned += 1
+            if product.apply_tire_dimensions():
+                updated += 1
+                pending.append(product)
+            if product.tire_width is None:
+                unparsed += 1
+            if len(pending) >= batch_size:
+                if not dry_run:
+                    Product.objects.bulk_update(pending, Product.TIRE_DIMENSION_FIELDS)
+                pending = []
+
+        if pending and not dry_run:
+            Product.objects.bulk_update(pending, Product.TIRE_DIMENSION_FIELDS)
+        if updated and not dry_run:
+            # bulk_update() ne déclenche pas les signaux : filtres et pages du catalogue à recalculer
+            bump_catalogue_version()
+
+        self.stdout.write(f"{scanned} produit(s) analysé(s), {unparsed} sans dimension reconnue.")
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f"{updated} produit(s) seraient mis à jour (dry-run)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{updated} produit(s) mis à jour."))
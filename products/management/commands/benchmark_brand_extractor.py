@@ -0,0 +1,139 @@
+"""
+Django management command that benchmarks the compiled brand / size
+extractor (products.brand_extractor) against the former word-window loops
+on a generated corpus of tyre designations, and checks that both return
+exactly the same (brand, size) for every name.
+
+The corpus mixes every BRAND_CANONICAL key (various casings, trailing
+punctuation), skip words, sizes, models and the names of the products
+already in the catalogue.
+
+Usage (on VPS):
+    python manage.py benchmark_brand_extractor
+    python manage.py benchmark_brand_extractor --names 100000 --repeat 3
+"""
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.brand_extractor import BrandSizeExtractor
+from products.import_views import BRAND_CANONICAL, KNOWN_BRANDS, SKIP_WORDS
+from products.models import Product
+
+MODELS = ['Pilot Sport 4', 'Primacy 4+', 'Energy Saver', 'CrossClimate 2', 'Alpin 6', 'EfficientGrip',
+          'Turanza T005', 'Cinturato P7', 'PremiumContact 6', 'Winter Sottozero', 'Ventus Prime',
+          'Blizzak LM005', 'Ecopia EP150', 'Kinergy 4S2', 'all season', 'ultra contact', 'Sport Maxx RT2']
+NOISE = ['XL', 'TL', 'RunFlat', 'RFT', 'M+S', '3PMSF', 'DOT2023', 'FR', '91V', '94W', 'A/B', '-', 'neuf',
+         'promo', 'Lot de 4', 'DEMO', 'ref.', '(stock)', 'x4', 'Été', 'hiver', 'Neige']
+
+
+def reference_extract(name: str):
+    """The former import_views.extract_brand_size_from_name, kept as the benchmark baseline."""
+    brand = ''
+    size = ''
+    size_match = re.search(r'\d{3}/\d{2}\s*[Rr]\s*\d{2,3}', name)
+    if size_match:
+        size = size_match.group(0).replace(' ', '')
+
+    parts = name.strip().split()
+
+    for i in range(len(parts) - 1):
+        two_word = f"{parts[i].rstrip('.,')} {parts[i + 1].rstrip('.,')}"
+        two_lower = two_word.lower()
+        if two_lower in KNOWN_BRANDS:
+            brand = BRAND_CANONICAL.get(two_lower, two_word)
+            break
+
+    if not brand:
+        for part in parts:
+            p_lower = part.lower().rstrip('.,')
+            if p_lower in SKIP_WORDS:
+                continue
+            if not part:
+                continue
+            if part[0].isdigit() or (len(part) <= 4 and part[0].isalpha() and any(c.isdigit() for c in part)):
+                continue
+            if p_lower in KNOWN_BRANDS:
+                brand = part.rstrip('.,')
+                break
+            if part[0].isupper() and len(part) > 2:
+                brand = part.rstrip('.,')
+                break
+
+    return brand, size
+
+
+def _casing(rng: random.Random, word: str) -> str:
+    return rng.choice([word, word.lower(), word.upper(), word.title()])
+
+
+def build_corpus(count: int, seed: int, catalogue: list[str]) -> list[str]:
+    rng = random.Random(seed)
+    brands = list(BRAND_CANONICAL)
+    names = []
+    for _ in range(count):
+        if catalogue and rng.random() < 0.1:
+            names.append(rng.choice(catalogue))
+            continue
+        words = []
+        if rng.random() < 0.4:
+            words.append(_casing(rng, rng.choice(sorted(SKIP_WORDS))))
+        if rng.random() < 0.85:
+            words.append(_casing(rng, rng.choice(brands)) + rng.choice(['', '', '', '.', ',']))
+        words.append(rng.choice(MODELS))
+        width, ratio, rim = rng.choice([155, 175, 195, 205, 225, 245, 265, 315]), rng.choice([35, 45, 55, 65, 70]), rng.choice([14, 15, 16, 17, 18, 19, 22])
+        words.insert(rng.randrange(len(words) + 1), rng.choice([f'{width}/{ratio}R{rim}', f'{width}/{ratio} R {rim}', f'{width}/{ratio}r{rim}', f'R{rim}']))
+        words.extend(rng.sample(NOISE, rng.randint(0, 3)))
+        names.append(' '.join(words))
+    return names
+
+
+class Command(BaseCommand):
+    help = "Benchmark the compiled brand/size extractor against the former implementation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--names', type=int, default=100000, help='Corpus size (default: 100000)')
+        parser.add_argument('--repeat', type=int, default=1, help='Timed runs, best one kept (default: 1)')
+        parser.add_argument('--seed', type=int, default=0, help='Corpus random seed (default: 0)')
+
+    def handle(self, *args, **options):
+        catalogue = list(Product.objects.values_list('name', flat=True)[:10000])
+        names = build_corpus(options['names'], options['seed'], catalogue)
+        distinct = len(set(names))
+        self.stdout.write(f"Corpus : {len(names)} noms ({distinct} distincts, {len(catalogue)} du catalogue).")
+
+        extractor = BrandSizeExtractor(BRAND_CANONICAL, SKIP_WORDS, cache_size=max(distinct, 1))
+        mismatches = [name for name in names if extractor.extract(name) != reference_extract(name)]
+        if mismatches:
+            for name in mismatches[:10]:
+                self.stderr.write(f"  {name!r}: {reference_extract(name)!r} != {extractor.extract(name)!r}")
+            raise CommandError(f"{len(mismatches)} résultat(s) différent(s) de l'implémentation de référence.")
+        self.stdout.write(self.style.SUCCESS("Résultats identiques sur tout le corpus."))
+
+        def best(run, before=None):
+            timings = []
+            for _ in range(options['repeat']):
+                if before:
+                    before()
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            return min(timings)
+
+        baseline = best(lambda: [reference_extract(name) for name in names])
+        compiled = best(lambda: [extractor._extract(name) for name in names])
+        memo_cold = best(lambda: [extractor.extract(name) for name in names], before=extractor.cache_clear)
+        memo_warm = best(lambda: [extractor.extract(name) for name in names])
+
+        for label, seconds in (
+            ('Ancienne implémentation', baseline),
+            ('Compilée (sans cache)', compiled),
+            ('Compilée + LRU, cache vide', memo_cold),
+            ('Compilée + LRU, cache chaud', memo_warm),
+        ):
+            self.stdout.write(
+                f"  {label:<28} {seconds * 1000:8.1f} ms  "
+                f"{len(names) / seconds:>11,.0f} noms/s  x{baseline / seconds:.1f}"
+            )
@@ -0,0 +1,60 @@
+"""
+Django management command that processes queued Excel imports (ImportJob).
+
+The upload / run endpoints only enqueue the job; this worker claims them
+(SELECT ... FOR UPDATE SKIP LOCKED, so several workers can run side by side)
+and creates / updates the products outside of gunicorn.
+
+Usage (on VPS):
+    python manage.py import_worker              # tourne en continu (systemd / supervisor)
+    python manage.py import_worker --once       # traite la file puis s'arrête (cron)
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from products import import_queue
+
+
+class Command(BaseCommand):
+    help = "Process queued product import jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the queued jobs then exit instead of polling forever',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds between two polls of an empty queue (default: 2)',
+        )
+        parser.add_argument(
+            '--stale-minutes',
+            type=int,
+            default=30,
+            help='Requeue jobs stuck in "running" without heartbeat for this long (default: 30)',
+        )
+
+    def handle(self, *args, **options):
+        requeued = import_queue.requeue_stale_jobs(options['stale_minutes'])
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"{requeued} import(s) interrompu(s) remis en file."))
+
+        self.stdout.write("Worker d'import démarré.")
+        while True:
+            close_old_connections()
+            job = import_queue.claim_next_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            self.stdout.write(f"Import {job.id} ({job.original_filename})…")
+            import_queue.process_job(job)
+            style = self.style.SUCCESS if job.status == 'done' else self.style.ERROR
+            self.stdout.write(style(f"  {job.status} : {job.message}"))
@@ -0,0 +1,42 @@
+"""
+Django management command to (re)build the catalogue full-text index.
+
+On PostgreSQL this fills Product.search_vector for every product — run it
+once after the migration that adds the column. On other databases the
+index lives in each web process and is rebuilt on first search, so there
+is nothing to do.
+
+Usage (on VPS):
+    python manage.py rebuild_search_index
+"""
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from products import search
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search vectors of all products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of products indexed per query (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                "Index en mémoire (non PostgreSQL) : reconstruit automatiquement à la première recherche."
+            ))
+            return
+
+        batch_size = options['batch_size']
+        pks = list(Product.objects.order_by('pk').values_list('pk', flat=True))
+        for start in range(0, len(pks), batch_size):
+            search.index_products(pks[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"{len(pks)} produit(s) indexé(s)."))
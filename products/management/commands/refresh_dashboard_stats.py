@@ -0,0 +1,22 @@
+"""
+Django management command that recomputes the admin dashboard statistics
+snapshot (products.dashboard), so the admin home page never has to.
+
+Usage (on VPS):
+    python manage.py refresh_dashboard_stats
+    # cron, toutes les minutes :
+    * * * * * cd /var/www/Pneushop && venv/bin/python manage.py refresh_dashboard_stats
+"""
+from django.core.management.base import BaseCommand
+
+from products import dashboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin dashboard statistics snapshot"
+
+    def handle(self, *args, **options):
+        snapshot = dashboard.refresh()
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistiques recalculées en {snapshot.duration_ms:.0f} ms ({snapshot.computed_at:%Y-%m-%d %H:%M:%S})."
+        ))
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_importjob_file_hash_product_import_job_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='load_index',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Indice de charge'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='speed_rating',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=2, verbose_name='Indice de vitesse'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tire_aspect',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Série'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tire_rim',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='Diamètre'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='tire_width',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Largeur'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tire_width', 'tire_aspect', 'tire_rim'], name='product_tire_dims_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:43
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_gin_index(apps, schema_editor):
+    # GIN n'existe que sous PostgreSQL — ailleurs products.search utilise un index en mémoire
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS products_product_search_vector_gin '
+            'ON products_product USING GIN (search_vector);'
+        )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS products_product_search_vector_gin;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_product_tire_dimensions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_per_second',
+            field=models.FloatField(blank=True, null=True, verbose_name='Débit (lignes/s)'),
+        ),
+    ]
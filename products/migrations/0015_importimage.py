@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_importjob_rows_per_second'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hash', models.CharField(max_length=32, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': "Image d'import",
+                'verbose_name_plural': "Images d'import",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_importimage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='changeset',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='dry_run',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='unchanged_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='importjob',
+            name='status',
+            field=models.CharField(choices=[('uploaded', 'Téléversé'), ('queued', 'En attente'), ('running', 'En cours'), ('previewed', 'Aperçu prêt'), ('done', 'Terminé'), ('failed', 'Échoué')], default='queued', max_length=20),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_importjob_changeset'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference', models.CharField(max_length=100, unique=True)),
+                ('fingerprint', models.CharField(max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': "Empreinte d'import",
+                'verbose_name_plural': "Empreintes d'import",
+            },
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='skipped_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
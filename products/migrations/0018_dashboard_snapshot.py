@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:20
+
+from django.db import migrations, models
+import rest_framework.utils.encoders
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_import_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(default='admin', max_length=50, unique=True)),
+                ('data', models.JSONField(default=dict, encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('computed_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField(default=0, verbose_name='Durée du calcul (ms)')),
+            ],
+            options={
+                'verbose_name': 'Instantané du tableau de bord',
+                'verbose_name_plural': 'Instantanés du tableau de bord',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0018_dashboard_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='apply_requested',
+            field=models.BooleanField(default=False),
+        ),
+    ]
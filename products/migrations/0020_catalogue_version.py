@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:29
+
+import time
+
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    CatalogueVersion = apps.get_model('products', 'CatalogueVersion')
+    CatalogueVersion.objects.get_or_create(pk=1, defaults={'value': int(time.time() * 1000)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0019_importjob_apply_requested'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogueVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Version du catalogue',
+                'verbose_name_plural': 'Versions du catalogue',
+            },
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
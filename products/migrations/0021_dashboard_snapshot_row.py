@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:40
+
+from datetime import datetime, timezone
+
+from django.db import migrations
+
+
+def create_snapshot_row(apps, schema_editor):
+    # Ligne créée ici une fois pour toutes : les requêtes ne font que la verrouiller
+    # et la mettre à jour (products.dashboard.refresh) — date ancienne = à recalculer
+    DashboardSnapshot = apps.get_model('products', 'DashboardSnapshot')
+    DashboardSnapshot.objects.get_or_create(
+        key='admin', defaults={'computed_at': datetime(1970, 1, 1, tzinfo=timezone.utc)},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0020_catalogue_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_snapshot_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:42
+
+import time
+
+from django.db import migrations, models
+
+
+def create_index_row(apps, schema_editor):
+    # La ligne existante (0020) devient la clé 'catalogue' par défaut
+    CatalogueVersion = apps.get_model('products', 'CatalogueVersion')
+    CatalogueVersion.objects.get_or_create(key='index', defaults={'value': int(time.time() * 1000)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0021_dashboard_snapshot_row'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogueversion',
+            name='key',
+            field=models.CharField(default='catalogue', max_length=50, unique=True),
+        ),
+        migrations.RunPython(create_index_row, migrations.RunPython.noop),
+    ]
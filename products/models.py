@@ -1,7 +1,10 @@
+import re
 import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.contrib.auth import get_user_model
 from decimal import Decimal
+from rest_framework.utils.encoders import JSONEncoder
 
 User = get_user_model()
 
@@ -20,12 +23,42 @@ class Category(models.Model):
         return self.name
 
 
+# Dimension pneu : "225/45R17", "225/45 ZR 17 91W", "195/65R15 91/89T"...
+TIRE_SIZE_RE = re.compile(
+    r'(?P<width>\d{3})\s*/\s*(?P<aspect>\d{2})\s*Z?\s*R\s*(?P<rim>\d{2})(?!\d|[.,]\d)'
+    r'(?:\s*C)?(?:\s*(?:XL|RF|RFT))?(?:\s*(?P<load>\d{2,3})(?:/\d{2,3})?\s*(?P<speed>[A-HJ-NP-Y])\b)?',
+    re.IGNORECASE,
+)
+
+
+def parse_tire_size(text: str) -> dict:
+    """
+    Extrait largeur / série / diamètre / indice de charge / indice de vitesse
+    d'une chaîne ("225/45R17 91W"). Retourne un dict (vide si aucune dimension).
+    """
+    if not text:
+        return {}
+    match = TIRE_SIZE_RE.search(text)
+    if not match:
+        return {}
+    dims = {
+        'tire_width': int(match.group('width')),
+        'tire_aspect': int(match.group('aspect')),
+        'tire_rim': int(match.group('rim')),
+    }
+    if match.group('load'):
+        dims['load_index'] = int(match.group('load'))
+        dims['speed_rating'] = match.group('speed').upper()
+    return dims
+
+
 class Product(models.Model):
     SEASON_CHOICES = [
         ('summer', 'Été'),
         ('winter', 'Hiver'),
         ('all_season', '4 saisons'),
     ]
+    TIRE_DIMENSION_FIELDS = ('tire_width', 'tire_aspect', 'tire_rim', 'load_index', 'speed_rating')
 
     name = models.CharField('Nom', max_length=255, blank=True)
     slug = models.SlugField('Slug', max_length=255, blank=True, null=True)
@@ -56,13 +89,52 @@ class Product(models.Model):
     promotion_end_date = models.DateField('Fin de promotion', null=True, blank=True)
     import_job = models.ForeignKey('ImportJob', on_delete=models.SET_NULL, null=True, blank=True, related_name='products', verbose_name="Fichier d'import")
 
+    # Dimensions extraites de `size` (ou du nom) à l'enregistrement — filtres catalogue indexés
+    tire_width = models.PositiveSmallIntegerField('Largeur', null=True, blank=True, editable=False)
+    tire_aspect = models.PositiveSmallIntegerField('Série', null=True, blank=True, editable=False)
+    tire_rim = models.PositiveSmallIntegerField('Diamètre', null=True, blank=True, editable=False, db_index=True)
+    load_index = models.PositiveSmallIntegerField('Indice de charge', null=True, blank=True, editable=False, db_index=True)
+    speed_rating = models.CharField('Indice de vitesse', max_length=2, blank=True, editable=False, db_index=True)
+
+    # Recherche plein texte (PostgreSQL) — maintenu par products.search, index GIN créé en migration
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
+
     class Meta:
         verbose_name = 'Produit'
         verbose_name_plural = 'Produits'
+        indexes = [
+            models.Index(fields=['tire_width', 'tire_aspect', 'tire_rim'], name='product_tire_dims_idx'),
+            # Pagination par curseur sur le tri par défaut (-created_at, -id)
+            models.Index(fields=['-created_at', '-id'], name='product_created_id_idx'),
+        ]
 
     def __str__(self):
         return f'{self.brand} - {self.name} - {self.size}'
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'size', 'name'} & set(update_fields):
+            self.apply_tire_dimensions()
+            if update_fields is not None:
+                kwargs['update_fields'] = list(update_fields) + list(self.TIRE_DIMENSION_FIELDS)
+        super().save(*args, **kwargs)
+
+    def apply_tire_dimensions(self):
+        """
+        Renseigne les colonnes de dimension depuis `size`, complétées par le nom
+        (l'import n'extrait souvent que "225/45R17" et laisse "91W" dans le nom).
+        Retourne True si une valeur a changé.
+        """
+        dims = parse_tire_size(self.name)
+        dims.update(parse_tire_size(self.size))
+        changed = False
+        for field in self.TIRE_DIMENSION_FIELDS:
+            value = dims.get(field, '' if field == 'speed_rating' else None)
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                changed = True
+        return changed
+
     @property
     def is_on_sale(self):
         return bool(self.old_price and self.old_price > self.price)
@@ -101,10 +173,10 @@ class Order(models.Model):
     def save(self, *args, **kwargs):
         if not self.pk and not self.order_number:
             from django.utils import timezone
-            year = timezone.now().strftime('%y')
-            year_start = timezone.now().replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
-            order_count = Order.objects.filter(created_at__gte=year_start).count()
-            self.order_number = f'CPS{year}{order_count:06d}'
+            from orders.sequences import document_number
+            prefix = f"CPS{timezone.now().strftime('%y')}"
+            # Séquence distincte de orders.Order (table séparée)
+            self.order_number = document_number(prefix, 6, Order.objects.all(), 'order_number', name=f'products.{prefix}')
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -246,6 +318,7 @@ class ImportJob(models.Model):
         ('uploaded', 'Téléversé'),
         ('queued', 'En attente'),
         ('running', 'En cours'),
+        ('previewed', 'Aperçu prêt'),
         ('done', 'Terminé'),
         ('failed', 'Échoué'),
     ]
@@ -257,10 +330,18 @@ class ImportJob(models.Model):
     file_hash = models.CharField(max_length=64, blank=True, db_index=True)
     total_rows = models.PositiveIntegerField(default=0)
     created_count = models.PositiveIntegerField(default=0)
+    unchanged_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
     error_count = models.PositiveIntegerField(default=0)
     images_processed = models.PositiveIntegerField(default=0)
+    rows_per_second = models.FloatField('Débit (lignes/s)', null=True, blank=True)
     errors = models.JSONField(default=list)
     created_names = models.JSONField(default=list)
+    # Dry-run : le worker calcule le changeset sans rien écrire (products.importer)
+    dry_run = models.BooleanField(default=False)
+    changeset = models.JSONField(null=True, blank=True)
+    # Application de l'aperçu demandée : le worker écrit le changeset au lieu de relire le fichier
+    apply_requested = models.BooleanField(default=False)
     message = models.TextField(blank=True)
     started_at = models.DateTimeField(null=True, blank=True)
     finished_at = models.DateTimeField(null=True, blank=True)
@@ -274,3 +355,60 @@ class ImportJob(models.Model):
 
     def __str__(self):
         return f'{self.original_filename} ({self.status})'
+
+
+class ImportImage(models.Model):
+    """Image intégrée d'un fichier d'import déjà envoyée : hash MD5 → URL (réutilisée d'un import à l'autre)."""
+    hash = models.CharField(max_length=32, unique=True)
+    url = models.URLField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Image d'import"
+        verbose_name_plural = "Images d'import"
+
+    def __str__(self):
+        return self.hash
+
+
+class ImportFingerprint(models.Model):
+    """Empreinte de la dernière ligne importée pour une référence fournisseur (ré-import incrémental)."""
+    reference = models.CharField(max_length=100, unique=True)
+    fingerprint = models.CharField(max_length=32)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Empreinte d'import"
+        verbose_name_plural = "Empreintes d'import"
+
+    def __str__(self):
+        return self.reference
+
+
+class DashboardSnapshot(models.Model):
+    """Statistiques du tableau de bord admin calculées périodiquement (products.dashboard)."""
+    key = models.CharField(max_length=50, unique=True, default='admin')
+    # Encodeur de DRF : le JSON stocké est celui que l'API renverrait (Decimal, dates)
+    data = models.JSONField(default=dict, encoder=JSONEncoder)
+    computed_at = models.DateTimeField()
+    duration_ms = models.FloatField('Durée du calcul (ms)', default=0)
+
+    class Meta:
+        verbose_name = 'Instantané du tableau de bord'
+        verbose_name_plural = 'Instantanés du tableau de bord'
+
+    def __str__(self):
+        return f'{self.key} @ {self.computed_at}'
+
+
+class CatalogueVersion(models.Model):
+    """Versions partagées du catalogue (products.versions) : une ligne par clé, commune à tous les process."""
+    key = models.CharField(max_length=50, unique=True, default='catalogue')
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Version du catalogue'
+        verbose_name_plural = 'Versions du catalogue'
+
+    def __str__(self):
+        return f'{self.key} = {self.value}'
@@ -0,0 +1,272 @@
+"""
+Full-text search for the storefront catalogue (?search= on ProductListView).
+
+Each product is reduced to an accent-folded document split in three weights:
+    A — name, brand
+    B — size, compact size ("2055516"), reference, designation
+    C — description, type
+
+Two backends share that document:
+  - PostgreSQL: `Product.search_vector` (tsvector, GIN index) queried with a
+    prefix tsquery and ranked with ts_rank.
+  - Anything else (SQLite in dev): an in-process inverted index
+    token → {product_id: weight}, built on first search. Every match is
+    handed to the database (same count and pages as PostgreSQL) as one
+    CASE with a single IN (...) per distinct score, ids inlined — no bound
+    parameters, so a one-letter query stays under SQLite's limit.
+    Like products.autocomplete, it follows the shared INDEX version
+    (products.versions) to pick up other processes' writes.
+
+Both are kept up to date by products.signals (post_save / post_delete, and
+index_changed() for the bulk writes) and can be rebuilt with
+`python manage.py rebuild_search_index`.
+"""
+import bisect
+import re
+import threading
+import unicodedata
+
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2}
+
+# Fields read to build the document — a save() touching none of them skips re-indexing
+SEARCH_FIELDS = ('name', 'brand', 'size', 'reference', 'designation', 'description', 'type')
+
+_LIGATURES = str.maketrans({'œ': 'oe', 'Œ': 'oe', 'æ': 'ae', 'Æ': 'ae', 'ß': 'ss'})
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def fold(text) -> str:
+    """Lowercase and strip accents ("Été Kléber" → "ete kleber")."""
+    text = unicodedata.normalize('NFKD', str(text or '').translate(_LIGATURES))
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text) -> list[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+
+def compact_size(size) -> str:
+    """"225/45 R17" → "2254517" (the way customers type sizes in the search box)."""
+    return ''.join(re.findall(r'\d+', str(size or '')))
+
+
+def build_document(values: dict) -> dict[str, str]:
+    """Return {'A': ..., 'B': ..., 'C': ...} folded texts for a product (or a values() dict)."""
+    get = lambda field: values.get(field) or ''  # noqa: E731
+    return {
+        'A': fold(f"{get('name')} {get('brand')}"),
+        'B': fold(f"{get('size')} {compact_size(get('size'))} {get('reference')} {get('designation')}"),
+        'C': fold(f"{get('description')} {get('type')}"),
+    }
+
+
+def _product_values(product) -> dict:
+    return {field: getattr(product, field, '') for field in SEARCH_FIELDS}
+
+
+class PostgresSearchBackend:
+    """tsvector column + GIN index; ranking by ts_rank."""
+
+    def search(self, queryset, query: str):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        from django.db.models import F
+
+        tokens = tokenize(query)
+        # Tokens are [a-z0-9]+ only, so the raw tsquery cannot be malformed
+        ts_query = SearchQuery(' & '.join(f'{t}:*' for t in tokens), search_type='raw', config='simple')
+        return queryset.filter(search_vector=ts_query).annotate(
+            search_rank=SearchRank(F('search_vector'), ts_query),
+        )
+
+    @staticmethod
+    def _vector(document: dict):
+        from django.contrib.postgres.search import SearchVector
+
+        vector = None
+        for weight, text in document.items():
+            part = SearchVector(Value(text), weight=weight, config='simple')
+            vector = part if vector is None else vector + part
+        return vector
+
+    def index_products(self, products):
+        from .models import Product
+
+        products = list(products)
+        for product in products:
+            product.search_vector = self._vector(build_document(_product_values(product)))
+        Product.objects.bulk_update(products, ['search_vector'], batch_size=500)
+
+    def remove_products(self, pks):
+        pass  # the row (and its vector) is gone with the product
+
+    def advance(self, old: int, new: int):
+        pass  # nothing held in memory
+
+
+class InvertedIndexBackend:
+    """
+    In-process inverted index for databases without full-text search.
+    Per process: each gunicorn worker builds its own copy on first search,
+    and rebuilds it when another process moved the INDEX version.
+    """
+
+    def __init__(self):
+        from . import versions
+
+        self._lock = threading.Lock()
+        self._postings: dict[str, dict[int, float]] | None = None
+        self._doc_tokens: dict[int, set[str]] = {}
+        self._sorted_tokens: list[str] | None = None
+        self._version = None  # version INDEX que reflète l'index
+        self._watch = versions.VersionWatch(versions.INDEX)
+
+    def _ensure_built(self):
+        from .models import Product
+
+        if self._postings is not None and self._version >= self._watch.current():
+            return
+        with self._lock:
+            # Lue avant les produits : une écriture pendant la construction relance la suivante
+            version = self._watch.read()
+            if self._postings is not None and self._version >= version:
+                return
+            self._postings = {}
+            self._doc_tokens = {}
+            for row in Product.objects.values('pk', *SEARCH_FIELDS).iterator(chunk_size=2000):
+                self._add(row['pk'], build_document(row))
+            self._sorted_tokens = None
+            self._version = version
+
+    def _add(self, pk, document: dict):
+        weights: dict[str, float] = {}
+        for weight, text in document.items():
+            for token in _TOKEN_RE.findall(text):
+                weights[token] = max(weights.get(token, 0.0), WEIGHTS[weight])
+        for token, weight in weights.items():
+            self._postings.setdefault(token, {})[pk] = weight
+        self._doc_tokens[pk] = set(weights)
+
+    def _remove(self, pk):
+        for token in self._doc_tokens.pop(pk, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(pk, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _matches(self, prefix: str) -> dict[int, float]:
+        """Best weight per product over every indexed token starting with `prefix`."""
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self._postings)
+        tokens = self._sorted_tokens
+        scores: dict[int, float] = {}
+        i = bisect.bisect_left(tokens, prefix)
+        while i < len(tokens) and tokens[i].startswith(prefix):
+            for pk, weight in self._postings.get(tokens[i], {}).items():
+                if weight > scores.get(pk, 0.0):
+                    scores[pk] = weight
+            i += 1
+        return scores
+
+    def search(self, queryset, query: str):
+        self._ensure_built()
+        with self._lock:
+            ranked: dict[int, float] | None = None
+            for token in tokenize(query):
+                matches = self._matches(token)
+                if ranked is None:
+                    ranked = matches
+                else:
+                    ranked = {pk: score + matches[pk] for pk, score in ranked.items() if pk in matches}
+                if not ranked:
+                    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+        return queryset.annotate(search_rank=self._rank_expression(queryset.model, ranked)).filter(search_rank__gt=0)
+
+    @staticmethod
+    def _rank_expression(model, ranked: dict[int, float]):
+        """CASE WHEN id IN (...) THEN score ... ELSE 0 END, one branch per distinct score."""
+        by_score: dict[float, list[int]] = {}
+        for pk, score in ranked.items():
+            by_score.setdefault(score, []).append(pk)
+        qn = connection.ops.quote_name
+        column = f'{qn(model._meta.db_table)}.{qn(model._meta.pk.column)}'
+        # Identifiants entiers issus de l'index (jamais de l'utilisateur) : écrits
+        # en clair, sans paramètres liés (limite de variables SQLite)
+        branches = ' '.join(
+            f'WHEN {column} IN ({",".join(str(int(pk)) for pk in pks)}) THEN {float(score)!r}'
+            for score, pks in by_score.items()
+        )
+        return RawSQL(f'CASE {branches} ELSE 0.0 END', (), output_field=FloatField())
+
+    def index_products(self, products):
+        if self._postings is None:
+            return  # not built yet — the first search will read fresh data
+        with self._lock:
+            for product in products:
+                self._remove(product.pk)
+                self._add(product.pk, build_document(_product_values(product)))
+            self._sorted_tokens = None
+
+    def remove_products(self, pks):
+        if self._postings is None:
+            return
+        with self._lock:
+            for pk in pks:
+                self._remove(pk)
+            self._sorted_tokens = None
+
+    def advance(self, old: int, new: int):
+        """This process's change moved the INDEX version old → new: already applied here."""
+        with self._lock:
+            if self._postings is not None and self._version == old:
+                self._version = new
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        if connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = InvertedIndexBackend()
+    return _backend
+
+
+def index_products(pks):
+    """(Re)index the given product ids in the active backend."""
+    from .models import Product
+
+    pks = list(pks)
+    if pks:
+        get_backend().index_products(Product.objects.filter(pk__in=pks).only('pk', *SEARCH_FIELDS))
+
+
+def remove_products(pks):
+    get_backend().remove_products(list(pks))
+
+
+class ProductSearchFilter(SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on the storefront list: same ?search=
+    parameter, served by the full-text backend and ordered by relevance unless
+    the client asked for an explicit ?ordering=.
+    Must come after OrderingFilter in filter_backends.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+        queryset = get_backend().search(queryset, query)
+        if not request.query_params.get(OrderingFilter.ordering_param):
+            queryset = queryset.order_by('-search_rank', '-created_at')
+        return queryset
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from . import facets
 from .models import Product, Category, SiteSettings
 
 
@@ -10,7 +11,16 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'slug', 'description', 'product_count']
 
     def get_product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
+        # Annotated queryset (CategoryListView) → no extra query
+        count = getattr(obj, 'active_product_count', None)
+        if count is not None:
+            return count
+        # Nested in ProductSerializer: one {category_id: count} map per
+        # serialization (a single GROUP BY) instead of a COUNT per product
+        counts = self.context.get('category_product_counts')
+        if counts is None:
+            counts = self.context['category_product_counts'] = facets.category_counts()
+        return counts.get(obj.pk, 0)
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -45,7 +55,7 @@ class ProductDetailSerializer(ProductSerializer):
         related = Product.objects.filter(
             category=obj.category,
             brand=obj.brand,
-        ).exclude(id=obj.id)[:4]
+        ).select_related('category').exclude(id=obj.id)[:4]
         return ProductSerializer(related, many=True, context=self.context).data
 
 
@@ -0,0 +1,68 @@
+"""
+Keep the derived catalogue structures in sync with Product writes.
+Connected in ProductsConfig.ready().
+
+index_changed() / index_removed() are also called by the writes that bypass
+signals (bulk import, queryset.update()).
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import autocomplete, http_cache, search, versions
+from .models import Category, Product, SiteSettings
+
+# Champs lus par l'index de recherche ou de suggestions
+INDEX_FIELDS = tuple(dict.fromkeys(search.SEARCH_FIELDS + autocomplete.INDEXED_FIELDS))
+
+
+def index_changed(pks):
+    """(Re)index the given products, then move the shared INDEX version."""
+    pks = list(pks)
+    if not pks:
+        return
+    search.index_products(pks)
+    autocomplete.index.update_products(Product.objects.filter(pk__in=pks).only('pk', *autocomplete.INDEXED_FIELDS))
+    _bump_index_version()
+
+
+def index_removed(pks):
+    pks = list(pks)
+    search.remove_products(pks)
+    autocomplete.index.remove_products(pks)
+    _bump_index_version()
+
+
+def _bump_index_version():
+    old, new = versions.bump_version(versions.INDEX)
+    search.get_backend().advance(old, new)
+    autocomplete.index.advance(old, new)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=['stock']) & co. leave the derived structures untouched
+    changed = set(update_fields) if update_fields is not None else None
+    if changed is None or changed & set(INDEX_FIELDS):
+        transaction.on_commit(partial(index_changed, [instance.pk]))
+    # Stock, prices... are all visible in the public responses
+    transaction.on_commit(http_cache.bump_catalogue_version)
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(index_removed, [instance.pk]))
+    transaction.on_commit(http_cache.bump_catalogue_version)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    transaction.on_commit(http_cache.bump_catalogue_version)
+
+
+@receiver(post_save, sender=SiteSettings)
+def site_settings_changed(sender, instance, **kwargs):
+    transaction.on_commit(http_cache.bump_catalogue_version)
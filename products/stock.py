@@ -0,0 +1,93 @@
+"""
+Stock reservation on order confirmation (orders.views.OrderDetailView).
+
+decrement_for_order() costs a fixed number of queries whatever the number of
+order lines:
+  1. one SELECT ... FOR UPDATE on every product of the order, ordered by id —
+     two confirmations sharing products always lock them in the same order,
+     so they queue behind each other instead of deadlocking;
+  2. one conditional UPDATE: stock = stock - CASE id ... END, guarded by
+     stock >= the ordered quantity;
+  3. one bulk_create of the matching StockMovement rows.
+
+Lines of the same product are summed. A product without enough stock is
+left untouched (reported in `insufficient`), like before.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from . import http_cache
+from .models import Product, StockMovement
+
+
+class StockReservation:
+    def __init__(self, missing: list[str] | None = None):
+        self.decremented: list[tuple[Product, int]] = []   # (product, quantity), stock à jour
+        self.insufficient: list[tuple[Product, int]] = []  # (product, ordered quantity)
+        self.missing: list[str] = missing or []            # OrderItem.product_id introuvables
+
+
+def _ordered_quantities(items) -> tuple[dict[int, int], list[str]]:
+    quantities: dict[int, int] = {}
+    missing = []
+    for item in items:
+        # OrderItem.product_id est un CharField : conversion ici, pas de cast implicite en SQL
+        try:
+            pk = int(item.product_id)
+        except (TypeError, ValueError):
+            missing.append(item.product_id)
+            continue
+        quantities[pk] = quantities.get(pk, 0) + item.quantity
+    return quantities, missing
+
+
+def decrement_for_order(order, user=None) -> StockReservation:
+    quantities, missing = _ordered_quantities(order.items.all())
+    result = StockReservation(missing=missing)
+    if not quantities:
+        return result
+
+    with transaction.atomic():
+        products = list(
+            Product.objects.select_for_update()
+            .filter(pk__in=quantities)
+            .order_by('pk')
+            .only('pk', 'name', 'stock')
+        )
+        found = {product.pk for product in products}
+        result.missing += [str(pk) for pk in quantities if pk not in found]
+
+        for product in products:
+            quantity = quantities[product.pk]
+            if product.stock >= quantity:
+                result.decremented.append((product, quantity))
+            else:
+                result.insufficient.append((product, quantity))
+        if not result.decremented:
+            return result
+
+        ordered = Case(
+            *[When(pk=product.pk, then=Value(quantity)) for product, quantity in result.decremented],
+            output_field=IntegerField(),
+        )
+        Product.objects.filter(
+            pk__in=[product.pk for product, _ in result.decremented], stock__gte=ordered,
+        ).update(stock=F('stock') - ordered)
+
+        StockMovement.objects.bulk_create([
+            StockMovement(
+                product=product,
+                product_name=product.name,
+                type='out',
+                quantity=-quantity,
+                reason='vente',
+                reference=f'CMD:{order.order_number}'[:100],
+                created_by=user if user is not None and user.is_authenticated else None,
+            )
+            for product, quantity in result.decremented
+        ])
+        for product, quantity in result.decremented:
+            product.stock -= quantity
+        # .update() n'envoie pas post_save : le stock est visible dans le catalogue public
+        transaction.on_commit(http_cache.bump_catalogue_version)
+    return result
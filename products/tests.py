@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from . import facets, http_cache
+from .models import Category, Product
+
+
+class ProductListQueriesTests(APITestCase):
+    """CategorySerializer.product_count nested in the product list (no COUNT per product)."""
+
+    def setUp(self):
+        cache.clear()  # réponses du catalogue (products.http_cache)
+        http_cache.get_catalogue_version()  # ligne créée par la migration (absente sans migrations)
+        self.categories = [
+            Category.objects.create(name=f'Catégorie {i}', slug=f'categorie-{i}') for i in range(3)
+        ]
+        for i in range(30):
+            Product.objects.create(
+                name=f'Pneu {i} 205/55R16',
+                slug=f'pneu-{i}',
+                price=100 + i,
+                category=self.categories[i % 3],
+                is_active=i % 5 != 0,
+            )
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        # Version du catalogue, page de produits, comptes par catégorie (un GROUP BY)
+        for page_size in (5, 20):
+            cache.clear()
+            with self.assertNumQueries(3):
+                response = self.client.get('/api/products/', {'pagination': 'cursor', 'page_size': page_size})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), page_size)
+
+    def test_nested_counts_match_category_endpoint(self):
+        facets.get_facets()
+        # Écriture sans signaux (autre worker, queryset.update()) suivie d'un
+        # changement de version
+        Product.objects.filter(category=self.categories[1], price__lt=115).update(is_active=False)
+        http_cache.bump_catalogue_version()
+
+        categories = self.client.get('/api/products/categories/').data
+        expected = {c['id']: c['product_count'] for c in categories.get('results', categories)}
+        products = self.client.get('/api/products/', {'pagination': 'cursor', 'page_size': 30}).data['results']
+        nested = {p['category']['id']: p['category']['product_count'] for p in products}
+        self.assertEqual(nested, expected)
+        self.assertEqual(nested[self.categories[1].pk], 4)
@@ -16,6 +16,8 @@ urlpatterns = [
     path('import/upload/', import_views.upload_import_file, name='import_upload'),
     path('import/files/', import_views.list_import_files, name='import_files_list'),
     path('import/files/<str:job_id>/run/', import_views.run_import_file, name='import_file_run'),
+    path('import/files/<str:job_id>/changeset/', import_views.import_changeset, name='import_file_changeset'),
+    path('import/files/<str:job_id>/apply/', import_views.apply_import_changeset, name='import_file_apply'),
     path('import/files/<str:job_id>/', import_views.delete_import_file, name='import_file_delete'),
     path('<int:id>/', views.ProductUpdateView.as_view(), name='product_update'),
     path('<slug:slug>/', views.ProductDetailView.as_view(), name='product_detail'),
@@ -0,0 +1,74 @@
+"""
+Version stamps shared by every process (one CatalogueVersion row per key):
+
+    CATALOGUE   moves on every catalogue write (products, categories, site
+                settings): ETags and cached responses (products.http_cache),
+                cached facets (products.facets).
+    INDEX       moves only when a field of the search / suggestion indexes
+                changes (name, brand, size, reference, slug, is_active...):
+                the in-process indexes (products.autocomplete) are rebuilt
+                when another process moved it.
+
+A value is a millisecond timestamp, bumped by at least 1, so it also serves as
+Last-Modified. bump_version() returns (old, new): a process that has just
+applied its own change to its indexes moves them to `new` without a rebuild
+when no other process wrote in between (the index was at `old`).
+
+VersionWatch reads a version at most every CATALOGUE_INDEX_POLL_INTERVAL
+seconds, so a suggestion keystroke does not cost a query.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import CatalogueVersion
+
+CATALOGUE = 'catalogue'
+INDEX = 'index'
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def get_version(key: str) -> int:
+    version = CatalogueVersion.objects.filter(key=key).values_list('value', flat=True).first()
+    if version is None:
+        # Ligne absente (base créée sans les migrations) : recréée
+        version = CatalogueVersion.objects.get_or_create(key=key, defaults={'value': _now_ms()})[0].value
+    return version
+
+
+def bump_version(key: str) -> tuple[int, int]:
+    """Move the `key` version forward; returns (previous value, new value)."""
+    with transaction.atomic():
+        row = CatalogueVersion.objects.select_for_update().filter(key=key).first()
+        if row is None:
+            CatalogueVersion.objects.get_or_create(key=key, defaults={'value': _now_ms()})
+            row = CatalogueVersion.objects.select_for_update().get(key=key)
+        old = row.value
+        # Verrou de ligne : deux écritures simultanées donnent deux versions distinctes
+        row.value = max(old + 1, _now_ms())
+        row.save(update_fields=['value'])
+    return old, row.value
+
+
+class VersionWatch:
+    """This process's view of a version, read from the database at most every poll interval."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._value = None
+        self._read_at = 0.0
+
+    def current(self) -> int:
+        interval = getattr(settings, 'CATALOGUE_INDEX_POLL_INTERVAL', 5)
+        if self._value is None or time.monotonic() - self._read_at >= interval:
+            return self.read()
+        return self._value
+
+    def read(self) -> int:
+        self._value = get_version(self.key)
+        self._read_at = time.monotonic()
+        return self._value
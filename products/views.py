@@ -1,33 +1,33 @@
+from django.db.models import Count, Q
 from rest_framework import generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+
+from pneushop.pagination import KeysetPaginationMixin
 
 from .models import Product, Category, SiteSettings
+from . import autocomplete, facets
+from .http_cache import CatalogueCacheMixin, catalogue_cache
+from .search import ProductSearchFilter
 from .serializers import ProductSerializer, ProductDetailSerializer, CategorySerializer, SiteSettingsSerializer
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(CatalogueCacheMixin, KeysetPaginationMixin, generics.ListAPIView):
     queryset = Product.objects.filter(is_active=True).select_related('category').order_by('-created_at')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # ProductSearchFilter (plein texte, classé par pertinence) doit passer après OrderingFilter
+    filter_backends = [DjangoFilterBackend, OrderingFilter, ProductSearchFilter]
     filterset_fields = ['category', 'brand', 'season', 'is_featured']
-    # Added 'reference' and 'designation' to search_fields for DOT/FIFO achat search
+    # Champs couverts par le document de recherche (voir products.search.build_document)
     search_fields = ['name', 'brand', 'description', 'size', 'reference', 'designation']
     # fabrication_date en ordering_fields → permet le tri FIFO côté vente
     ordering_fields = ['price', 'created_at', 'name', 'fabrication_date']
     ordering = ['-created_at']
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-
     def get_queryset(self):
         queryset = super().get_queryset()
         params = self.request.query_params
@@ -52,40 +52,33 @@ class ProductListView(generics.ListAPIView):
         if on_sale and on_sale.lower() == 'true':
             queryset = queryset.filter(old_price__isnull=False)
 
-        width = params.get('width')
-        height = params.get('height')
-        diameter = params.get('diameter')
-        if width:
-            queryset = queryset.filter(size__startswith=str(width))
-        if height:
-            queryset = queryset.filter(size__contains=f'/{height}')
-        if diameter:
-            queryset = queryset.filter(size__endswith=str(diameter))
+        # Dimensions : égalités sur les colonnes indexées (voir Product.apply_tire_dimensions)
+        for param, field in (
+            ('width', 'tire_width'),
+            ('height', 'tire_aspect'),
+            ('diameter', 'tire_rim'),
+            ('loadIndex', 'load_index'),
+        ):
+            value = params.get(param)
+            if value:
+                try:
+                    queryset = queryset.filter(**{field: int(str(value).strip().upper().lstrip('R'))})
+                except ValueError:
+                    return queryset.none()
 
         speed_rating = params.get('speedRating')
         if speed_rating:
-            queryset = queryset.filter(size__icontains=speed_rating)
-
-        load_index = params.get('loadIndex')
-        if load_index:
-            queryset = queryset.filter(size__icontains=load_index)
+            queryset = queryset.filter(speed_rating=speed_rating.strip().upper())
 
         return queryset
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductDetailView(CatalogueCacheMixin, generics.RetrieveAPIView):
     queryset = Product.objects.filter(is_active=True).select_related('category')
     serializer_class = ProductDetailSerializer
     permission_classes = [AllowAny]
     lookup_field = 'slug'
 
-    def finalize_response(self, request, response, *args, **kwargs):
-        response = super().finalize_response(request, response, *args, **kwargs)
-        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-        response['Pragma'] = 'no-cache'
-        response['Expires'] = '0'
-        return response
-
 
 class ProductUpdateView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Product.objects.all()
@@ -100,19 +93,21 @@ class ProductUpdateView(generics.RetrieveUpdateDestroyAPIView):
         return response
 
 
-class CategoryListView(generics.ListAPIView):
-    queryset = Category.objects.all()
+class CategoryListView(CatalogueCacheMixin, generics.ListAPIView):
+    queryset = Category.objects.annotate(
+        active_product_count=Count('products', filter=Q(products__is_active=True)),
+    )
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]
 
 
-class FeaturedProductsView(generics.ListAPIView):
+class FeaturedProductsView(CatalogueCacheMixin, generics.ListAPIView):
     queryset = Product.objects.filter(is_active=True, is_featured=True).select_related('category')
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
 
 
-class PromotionProductsView(generics.ListAPIView):
+class PromotionProductsView(CatalogueCacheMixin, generics.ListAPIView):
     """GET /api/products/promotions/ — liste des produits en promotion"""
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
@@ -195,32 +190,22 @@ def set_promotion(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def product_search_suggestions(request):
-    """Get search suggestions for products"""
+    """
+    Get search suggestions for products (name, brand, reference or size such as
+    "2254517"), served from the in-memory prefix index — no query per keystroke.
+    """
     query = request.query_params.get('q', '')
-    if not query:
+    if not query.strip():
         return Response([])
-    products = Product.objects.filter(
-        is_active=True,
-        name__icontains=query,
-    ).values('brand', 'name')[:10]
-    return Response(list(products))
+    return Response(autocomplete.index.suggest(query, limit=10))
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@catalogue_cache
 def product_filters(request):
-    """Get available filter options"""
-    brands = Product.objects.filter(is_active=True).values_list('brand', flat=True).distinct()
-    seasons = Product.objects.filter(is_active=True).values_list('season', flat=True).distinct()
-    prices = Product.objects.filter(is_active=True).values_list('price', flat=True)
-    return Response({
-        'brands': [b for b in brands if b],
-        'seasons': [{'value': s, 'label': s} for s in seasons if s],
-        'price_range': {
-            'min': float(min(prices)) if prices else 0,
-            'max': float(max(prices)) if prices else 0,
-        },
-    })
+    """Get available filter options with product counts (cached, see products.facets)"""
+    return Response(facets.get_facets())
 
 
 @api_view(['GET', 'PUT', 'PATCH'])
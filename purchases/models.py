@@ -49,13 +49,8 @@ class PurchaseOrder(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            from django.utils import timezone
-            now = timezone.now()
-            count = PurchaseOrder.objects.filter(
-                order_date__year=now.year,
-                order_date__month=now.month,
-            ).count()
-            self.order_number = f'ACH-{now.month:02d}{now.year}-{count:04d}'
+            from orders.sequences import next_purchase_number
+            self.order_number = next_purchase_number()
         super().save(*args, **kwargs)
 
 